@@ -0,0 +1,291 @@
+import argparse
+import html
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger(__name__)
+
+JOB_TITLES = ['Data Scientist', 'Software Engineer', 'Machine Learning Engineer', 'Data Engineer', 'Backend Developer', 'Analytics Engineer']
+COMPANIES = ['Acme Corp', 'Globex', 'Initech', 'Umbrella Analytics', 'Hooli', 'Stark Industries', 'Wayne Data']
+LOCATIONS = ['Vancouver, BC', 'Toronto, ON', 'Hong Kong', 'Remote']
+DESCRIPTION_SECTIONS = [
+    ("About the role", "You will design, build and ship {title} solutions used by millions of customers."),
+    ("Responsibilities", "- Build data pipelines in Python and SQL\n- Train and deploy models\n- Work with product teams on experiments"),
+    ("Requirements", "- {years}+ years of experience with Python\n- Experience with Spark, Airflow or dbt\n- Strong communication skills"),
+    ("Benefits", "- Extended health and dental\n- Flexible working hours\n- Learning budget"),
+    ("Equal opportunity", "{company} is an equal opportunity employer. All qualified applicants will receive consideration for employment."),
+]
+CLEARANCE_COOKIE = 'mock_cf_pass'
+
+CHALLENGE_PAGE = """<!DOCTYPE html><html><head><title>Just a moment...</title></head><body>
+<p>Checking your browser before accessing the site.</p>
+<script>setTimeout(function () {{ document.cookie = '{cookie}=1; path=/'; location.reload(); }}, {delay_ms});</script>
+</body></html>"""
+
+
+class MockJob:
+    def __init__(self, site: str, page: int, index: int, jobs_per_page: int):
+        n = page * jobs_per_page + index
+        rng = random.Random(f"{site}-{n}")
+        self.number = 4000000000 + n
+        self.job_id = f"{self.number:016x}" if site == 'indeed' else str(self.number)
+        self.title = rng.choice(JOB_TITLES)
+        self.company = rng.choice(COMPANIES)
+        self.location = rng.choice(LOCATIONS)
+        self.description = "\n".join(
+            f"{heading}:\n{body.format(title=self.title, company=self.company, years=rng.randint(2, 8))}" for heading, body in DESCRIPTION_SECTIONS
+        ) + f"\nJob reference: {self.job_id}"
+
+
+def _description_html(description: str) -> str:
+    return "".join(f"<p>{html.escape(line)}</p>" for line in description.splitlines())
+
+
+class MockJobBoard:
+    """Serves LinkedIn, Indeed and JobsDB shaped search and detail pages for local benchmarks.
+
+    Sites are mounted under /linkedin, /indeed and /jobsdb so they can be used as linkedin_url/indeed_url/jobsdb_url.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency: float = 0.0, jitter: float = 0.0, pages: int = 3, jobs_per_page: int = 10,
+                 challenge_rate: float = 0.0, challenge_delay: float = 1.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.pages = max(1, pages)
+        self.jobs_per_page = jobs_per_page
+        self.challenge_rate = challenge_rate
+        self.challenge_delay = challenge_delay
+        self.page_loads = Counter()  # (site, kind) -> requests served
+        self.challenges = Counter()  # site -> interstitials served
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MockJobBoard':
+        self._thread = threading.Thread(target=self.server.serve_forever, name='mock-job-board', daemon=True)
+        self._thread.start()
+        logger.info(f"Mock job board listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset_stats(self):
+        with self._lock:
+            self.page_loads.clear()
+            self.challenges.clear()
+
+    def _count(self, site: str, kind: str):
+        with self._lock:
+            self.page_loads[(site, kind)] += 1
+
+    def _should_challenge(self, site: str) -> bool:
+        with self._lock:
+            challenge = self.challenge_rate > 0 and self._rng.random() < self.challenge_rate
+            if challenge:
+                self.challenges[site] += 1
+            return challenge
+
+    def _sleep(self):
+        delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _jobs(self, site: str, page: int):
+        return [MockJob(site, page, index, self.jobs_per_page) for index in range(self.jobs_per_page)]
+
+    def _find_job(self, site: str, job_id: str) -> Optional[MockJob]:
+        try:
+            number = int(job_id, 16) if site == 'indeed' else int(job_id)
+        except ValueError:
+            return None
+        n = number - 4000000000
+        if n < 0 or n >= self.pages * self.jobs_per_page:
+            return None
+        return MockJob(site, n // self.jobs_per_page, n % self.jobs_per_page, self.jobs_per_page)
+
+    def _page_number(self, query: dict, key: str, per_page: int = 1) -> int:
+        try:
+            return int(query.get(key, ['0'])[0]) // per_page
+        except ValueError:
+            return 0
+
+    # LinkedIn: a list of cards whose click renders the details next to the list, or the job on its own at /jobs/view/<id>
+
+    def linkedin_search(self, query: dict) -> str:
+        page = self._page_number(query, 'start', self.jobs_per_page)
+        cards = "".join(
+            f'<li class="scaffold-layout__list-item" data-occludable-job-id="{job.job_id}">'
+            f'<a href="#" onclick="showJob(\'{job.job_id}\'); return false;">{html.escape(job.title)}</a></li>'
+            for job in self._jobs('linkedin', page)
+        )
+        next_button = ""
+        if page + 1 < self.pages:
+            next_button = (f'<button class="jobs-search-pagination__button--next" '
+                           f'onclick="location.search = \'?start={(page + 1) * self.jobs_per_page}\'">Next</button>')
+        return f"""<!DOCTYPE html><html><head><title>Jobs | LinkedIn</title></head><body>
+<div id="main"><div><div class="scaffold-layout__list-detail-inner scaffold-layout__list-detail-inner--grow">
+<div class="scaffold-layout__list"><div style="height: 400px; overflow-y: scroll;"><ul>{cards}</ul></div></div>
+<div id="details"></div>
+</div></div></div>
+{next_button}
+<script>
+function showJob(jobId) {{
+  fetch('/linkedin/jobs/details/' + jobId).then(function (r) {{ return r.text(); }}).then(function (body) {{
+    document.getElementById('details').innerHTML = body;
+  }});
+}}
+</script>
+</body></html>"""
+
+    def linkedin_details(self, job: MockJob) -> str:
+        return f"""<div class="job-details-jobs-unified-top-card__company-name"><a href="#">{html.escape(job.company)}</a></div>
+<div class="job-details-jobs-unified-top-card__job-title"><h1><a href="#">{html.escape(job.title)}</a></h1></div>
+<div class="job-details-jobs-unified-top-card__primary-description-container"><div><span>{html.escape(job.location)}</span></div></div>
+<div id="job-details">{_description_html(job.description)}</div>"""
+
+    def linkedin_view(self, job: MockJob) -> str:
+        return f"""<!DOCTYPE html><html><head><title>{html.escape(job.title)} | LinkedIn</title></head><body>
+{self.linkedin_details(job)}
+</body></html>"""
+
+    # Indeed: paginated cards with data-jk, details on /viewjob?jk=
+
+    def indeed_search(self, query: dict) -> str:
+        page = self._page_number(query, 'start', self.jobs_per_page)
+        cards = "".join(
+            f'<li><div><a data-jk="{job.job_id}" href="/indeed/viewjob?jk={job.job_id}">{html.escape(job.title)}</a></div></li>'
+            for job in self._jobs('indeed', page)
+        )
+        next_link = ""
+        if page + 1 < self.pages:
+            next_link = f'<a data-testid="pagination-page-next" href="/indeed/jobs?start={(page + 1) * self.jobs_per_page}">Next</a>'
+        return f"""<!DOCTYPE html><html><head><title>Jobs | Indeed</title></head><body>
+<div id="mosaic-provider-jobcards"><ul>{cards}</ul></div>{next_link}
+</body></html>"""
+
+    def indeed_details(self, job: MockJob) -> str:
+        return f"""<!DOCTYPE html><html><head><title>{html.escape(job.title)} | Indeed</title></head><body>
+<h1 class="jobsearch-JobInfoHeader-title"><span>{html.escape(job.title)}</span></h1>
+<div data-company-name="true"><a href="#">{html.escape(job.company)}</a></div>
+<div data-testid="inlineHeader-companyLocation">{html.escape(job.location)}</div>
+<div id="jobDescriptionText">{_description_html(job.description)}</div>
+</body></html>"""
+
+    # JobsDB: overlay links to /job/<id>, "Next" anchor toggled with aria-hidden
+
+    def jobsdb_search(self, query: dict) -> str:
+        page = self._page_number(query, 'page') - 1 if 'page' in query else 0
+        links = "".join(
+            f'<article><div><a data-automation="job-list-item-link-overlay" href="/jobsdb/job/{job.job_id}">{html.escape(job.title)}</a></div></article>'
+            for job in self._jobs('jobsdb', page)
+        )
+        has_next = page + 1 < self.pages
+        next_link = f'<a title="Next" aria-hidden="{"false" if has_next else "true"}" href="?page={page + 2}">Next</a>'
+        return f"""<!DOCTYPE html><html><head><title>Jobs | JobsDB</title></head><body>{links}{next_link}</body></html>"""
+
+    def jobsdb_details(self, job: MockJob) -> str:
+        return f"""<!DOCTYPE html><html><head><title>{html.escape(job.title)} | JobsDB</title></head><body>
+<h1 data-automation="job-detail-title">{html.escape(job.title)}</h1>
+<span data-automation="advertiser-name">{html.escape(job.company)}</span>
+<span data-automation="job-detail-location">{html.escape(job.location)}</span>
+<div data-automation="jobAdDetails">{_description_html(job.description)}</div>
+</body></html>"""
+
+    def route(self, path: str, query: dict):
+        # Returns (site, kind, html) or None when nothing matches
+        parts = [part for part in path.split('/') if part]
+        if not parts:
+            return None
+        site, rest = parts[0], parts[1:]
+        if site == 'linkedin':
+            if rest[:2] == ['jobs', 'search']:
+                return site, 'search', self.linkedin_search(query)
+            if rest[:2] == ['jobs', 'details'] and len(rest) == 3 and (job := self._find_job(site, rest[2])):
+                return site, 'detail', self.linkedin_details(job)
+            if rest[:2] == ['jobs', 'view'] and len(rest) == 3 and (job := self._find_job(site, rest[2])):
+                return site, 'detail', self.linkedin_view(job)
+        elif site == 'indeed':
+            if rest == ['jobs']:
+                return site, 'search', self.indeed_search(query)
+            if rest == ['viewjob'] and (job := self._find_job(site, query.get('jk', ['0'])[0])):
+                return site, 'detail', self.indeed_details(job)
+        elif site == 'jobsdb':
+            if len(rest) == 2 and rest[0] == 'job' and rest[1].isdigit() and (job := self._find_job(site, rest[1])):
+                return site, 'detail', self.jobsdb_details(job)
+            if rest and rest[0].endswith('-jobs'):
+                return site, 'search', self.jobsdb_search(query)
+        return None
+
+    def _handler_class(self):
+        board = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                board._sleep()
+                routed = board.route(url.path, parse_qs(url.query))
+                if routed is None:
+                    self._send(404, "<html><head><title>Not found</title></head><body>Not found</body></html>")
+                    return
+
+                site, kind, body = routed
+                cleared = f"{CLEARANCE_COOKIE}=1" in (self.headers.get('Cookie') or '')
+                # Detail fragments are fetched by the page's own script and never see the interstitial
+                is_fragment = site == 'linkedin' and kind == 'detail' and '/details/' in url.path
+                if not cleared and not is_fragment and board._should_challenge(site):
+                    self._send(403, CHALLENGE_PAGE.format(cookie=CLEARANCE_COOKIE, delay_ms=int(board.challenge_delay * 1000)))
+                    return
+
+                board._count(site, kind)
+                # The clearance is single use so every page load rolls the dice again
+                self._send(200, body, clear_cookie=cleared and not is_fragment)
+
+            def _send(self, status: int, body: str, clear_cookie: bool = False):
+                payload = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                if clear_cookie:
+                    self.send_header('Set-Cookie', f"{CLEARANCE_COOKIE}=; Max-Age=0; Path=/")
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve LinkedIn, Indeed and JobsDB shaped pages locally")
+    parser.add_argument("--port", type=int, default=8766, help="Defaults next to the daemon's status port so both can run at once")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra seconds added to every response")
+    parser.add_argument("--pages", type=int, default=3, help="Pagination depth of every search")
+    parser.add_argument("--jobs-per-page", type=int, default=10)
+    parser.add_argument("--challenge-rate", type=float, default=0.0, help="Share of page loads answered with a Cloudflare-style interstitial")
+    parser.add_argument("--challenge-delay", type=float, default=1.0, help="Seconds the interstitial waits before passing")
+    args = parser.parse_args()
+
+    board = MockJobBoard(port=args.port, latency=args.latency, jitter=args.jitter, pages=args.pages, jobs_per_page=args.jobs_per_page,
+                         challenge_rate=args.challenge_rate, challenge_delay=args.challenge_delay)
+    print(f"Indeed url: {board.base_url}/indeed, JobsDB url: {board.base_url}/jobsdb, LinkedIn url: {board.base_url}/linkedin")
+    try:
+        board.server.serve_forever()
+    except KeyboardInterrupt:
+        board.stop()
@@ -0,0 +1,101 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOB_PATH = 'blobs/descriptions.db'
+# SQLite caps the number of bound parameters of one statement
+MAX_LOOKUP_BATCH = 500
+
+
+class BlobStore:
+    """Content-addressed SQLite store of large texts, records and DataFrames carry the text's hash instead of the text."""
+
+    def __init__(self, path: str = DEFAULT_BLOB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = None
+
+    def configure(self, path: str):
+        with self._lock:
+            if path != self.path and self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self.path = path
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened lazily and again after a fork, as worker processes must not share the parent's connection
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA busy_timeout=30000")
+            # last_used is refreshed whenever a scrape stores the text again, prune drops the texts no run has seen lately
+            self._conn.execute("CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, data BLOB NOT NULL, last_used REAL NOT NULL DEFAULT 0)")
+            if 'last_used' not in {row[1] for row in self._conn.execute("PRAGMA table_info(blobs)")}:
+                self._conn.execute("ALTER TABLE blobs ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+                self._conn.execute("UPDATE blobs SET last_used = ?", (time.time(),))
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_blobs_last_used ON blobs(last_used)")
+            self._conn.commit()
+            self._pid = os.getpid()
+        return self._conn
+
+    @staticmethod
+    def make_key(text: str) -> str:
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def put(self, text: Optional[str]) -> str:
+        text = text or ''
+        key = self.make_key(text)
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                updated = conn.execute("UPDATE blobs SET last_used = ? WHERE hash = ?", (time.time(), key)).rowcount
+                if not updated:
+                    conn.execute("INSERT INTO blobs (hash, data, last_used) VALUES (?, ?, ?)", (key, zlib.compress(text.encode('utf-8')), time.time()))
+        return key
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        keys = list({key for key in keys if key})
+        found = {}
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(keys), MAX_LOOKUP_BATCH):
+                batch = keys[start:start + MAX_LOOKUP_BATCH]
+                rows = conn.execute(f"SELECT hash, data FROM blobs WHERE hash IN ({', '.join('?' * len(batch))})", batch).fetchall()
+                found.update((key, zlib.decompress(data).decode('utf-8')) for key, data in rows)
+        if len(found) < len(keys):
+            logger.warning(f"{len(keys) - len(found)} blob(s) missing from {self.path}")
+        return found
+
+    def get(self, key: str) -> str:
+        return self.get_many([key]).get(key, '')
+
+    def prune(self, retention_days: Optional[float]):
+        if not retention_days:
+            return
+        cutoff = time.time() - retention_days * 86400
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                deleted = conn.execute("DELETE FROM blobs WHERE last_used < ?", (cutoff,)).rowcount
+        # The freed pages are reused by later inserts, so the file stops growing without a VACUUM
+        logger.info(f"Pruned {deleted} blob(s) not stored for {retention_days} day(s) from {self.path}")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+DESCRIPTIONS = BlobStore()
@@ -0,0 +1,150 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+METRIC_PREFIX = 'job_scraper_'
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+
+class MetricsRegistry:
+    """Thread-safe labelled counters and histograms, exported per run as JSON or a Prometheus textfile."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        # (name, labels) -> [bucket counts..., sum, count]
+        self._histograms: Dict[Tuple[str, Labels], list] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.setdefault(key, [0] * (len(self.buckets) + 2))
+            bucket = bisect.bisect_left(self.buckets, value)
+            if bucket < len(self.buckets):
+                histogram[bucket] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> dict:
+        # Plain data that can be pickled back from worker processes and merged into the parent registry
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, list(labels), list(values)] for (name, labels), values in self._histograms.items()],
+            }
+
+    def merge(self, snapshot: dict):
+        with self._lock:
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                self._counters[key] = self._counters.get(key, 0) + value
+            for name, labels, values in snapshot['histograms']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                histogram = self._histograms.setdefault(key, [0] * (len(self.buckets) + 2))
+                for i, value in enumerate(values):
+                    histogram[i] += value
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value} for (name, labels), value in sorted(self._counters.items())]
+            histograms = []
+            for (name, labels), values in sorted(self._histograms.items()):
+                histograms.append({
+                    'name': name,
+                    'labels': dict(labels),
+                    'count': values[-1],
+                    'sum': values[-2],
+                    'buckets': dict(zip([str(bucket) for bucket in self.buckets], values[:len(self.buckets)])),
+                })
+        return {'counters': counters, 'histograms': histograms}
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            counter_names = sorted({name for name, _ in self._counters})
+            for name in counter_names:
+                lines.append(f"# TYPE {METRIC_PREFIX}{name} counter")
+                for (metric, labels), value in sorted(self._counters.items()):
+                    if metric == name:
+                        lines.append(f"{METRIC_PREFIX}{name}{_format_labels(labels)} {value}")
+
+            histogram_names = sorted({name for name, _ in self._histograms})
+            for name in histogram_names:
+                lines.append(f"# TYPE {METRIC_PREFIX}{name} histogram")
+                for (metric, labels), values in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bucket, count in zip(self.buckets, values):
+                        cumulative += count
+                        lines.append(f"{METRIC_PREFIX}{name}_bucket{_format_labels(labels, (('le', str(bucket)),))} {cumulative}")
+                    lines.append(f"{METRIC_PREFIX}{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {values[-1]}")
+                    lines.append(f"{METRIC_PREFIX}{name}_sum{_format_labels(labels)} {values[-2]}")
+                    lines.append(f"{METRIC_PREFIX}{name}_count{_format_labels(labels)} {values[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, run_id: str, json_dir: str = 'metrics', textfile_dir: str = None):
+        os.makedirs(json_dir, exist_ok=True)
+        with open(os.path.join(json_dir, f"{run_id}.json"), 'w', encoding='utf-8') as file:
+            json.dump({'run_id': run_id, 'exported_at': time.time(), **self.to_dict()}, file, indent=2)
+
+        textfile_dir = textfile_dir or json_dir
+        os.makedirs(textfile_dir, exist_ok=True)
+        content = self.to_prometheus()
+        content += f"# TYPE {METRIC_PREFIX}last_run_timestamp_seconds gauge\n"
+        content += f"{METRIC_PREFIX}last_run_timestamp_seconds{_format_labels(_labels({'run_id': run_id}))} {time.time()}\n"
+        # node_exporter may read the file at any moment, so it is replaced atomically
+        path = os.path.join(textfile_dir, f"{METRIC_PREFIX.rstrip('_')}.prom")
+        with open(path + '.tmp', 'w', encoding='utf-8') as file:
+            file.write(content)
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def prune_exports(retention_days: Optional[float], json_dir: str = 'metrics'):
+        if not retention_days or not os.path.isdir(json_dir):
+            return
+        cutoff = time.time() - retention_days * 86400
+        for name in os.listdir(json_dir):
+            path = os.path.join(json_dir, name)
+            if name.endswith('.json') and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+
+
+METRICS = MetricsRegistry()
@@ -0,0 +1,61 @@
+import importlib
+import logging
+import threading
+from importlib.metadata import entry_points
+from typing import Any, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class LazyRegistry:
+    """Maps names to `module:attribute` targets and imports a module only when one of its names is looked up.
+
+    Names that are not registered are looked up in the `group` entry points, which lets installed packages add
+    their own sites or LLM providers, e.g. in their pyproject.toml:
+
+        [project.entry-points."job_scraper.sites"]
+        glassdoor = "glassdoor_scraper:GlassdoorScraper"
+    """
+
+    def __init__(self, kind: str, group: Optional[str] = None, targets: Optional[Dict[str, str]] = None):
+        self.kind = kind
+        self.group = group
+        self._targets: Dict[str, Union[str, Any]] = dict(targets or {})
+        self._loaded: Dict[str, Any] = {}
+        self._plugins = None
+        self._lock = threading.Lock()
+
+    def register(self, name: str, target: Union[str, Any]):
+        # target is either a `module:attribute` string, imported on first use, or the object itself
+        with self._lock:
+            self._targets[name] = target
+            self._loaded.pop(name, None)
+
+    def _entry_points(self) -> dict:
+        # Installed distributions are only scanned the first time an unknown name is looked up
+        if self._plugins is None:
+            self._plugins = {entry_point.name: entry_point for entry_point in entry_points(group=self.group)} if self.group else {}
+        return self._plugins
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return sorted(set(self._targets) | set(self._entry_points()))
+
+    def get(self, name: str) -> Any:
+        with self._lock:
+            if name in self._loaded:
+                return self._loaded[name]
+            target = self._targets.get(name)
+            if target is None:
+                entry_point = self._entry_points().get(name)
+                if entry_point is None:
+                    raise ValueError(f"Unsupported {self.kind}: {name}, available: {', '.join(sorted(set(self._targets) | set(self._plugins)))}")
+                logger.info(f"Loading {self.kind} {name} from entry point {entry_point.value}")
+                loaded = entry_point.load()
+            elif isinstance(target, str):
+                module_name, _, attribute = target.partition(':')
+                loaded = getattr(importlib.import_module(module_name), attribute)
+            else:
+                loaded = target
+            self._loaded[name] = loaded
+            return loaded
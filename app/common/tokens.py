@@ -0,0 +1,8 @@
+import math
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough heuristic that works across providers: ~4 characters per token
+    if not text:
+        return 0
+    return math.ceil(len(text) / 4)
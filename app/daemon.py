@@ -0,0 +1,53 @@
+import argparse
+import logging
+import signal
+
+from main import setup_llm_service, setup_orchestrator
+from services.config_service import ConfigService
+from services.history_service import JobHistoryService
+from services.scheduler import DEFAULT_STATUS_PORT, StatusServer, TaskScheduler
+
+logger = logging.getLogger(__name__)
+
+if __name__ == '__main__':
+    from scrapers.browser_pool import BrowserPool
+
+    parser = argparse.ArgumentParser(description="Run the tasks of config.yml on their intervals with a warm browser and LLM client")
+    parser.add_argument("--config", default="config/config.yml")
+    args = parser.parse_args()
+
+    config_service = ConfigService(config_path=args.config)
+    # Kept for the daemon's lifetime, the LLM client is only rebuilt when the llm section of config.yml changes
+    history_service = JobHistoryService()
+    browser_pool = BrowserPool() if config_service.get_config().selenium.get('browser_pool', True) else None
+    llm_state = {}
+
+    def build_orchestrator():
+        config = config_service.get_config()
+        if llm_state.get('config') != config.llm:
+            logger.info("Setup LLM service")
+            if 'service' in llm_state:
+                # Reloads only happen between runs, nothing uses the previous service and its verdict cache connection anymore
+                llm_state['service'].close()
+            llm_state['config'], llm_state['service'] = config.llm, setup_llm_service(config)
+        return setup_orchestrator(config_service, llm_state['service'], history_service, browser_pool)
+
+    scheduler = TaskScheduler(config_service, build_orchestrator)
+    daemon_config = scheduler.daemon_config
+    status_server = StatusServer(scheduler, host=daemon_config.get('status_host', '127.0.0.1'),
+                                 port=daemon_config.get('status_port', DEFAULT_STATUS_PORT))
+    status_server.start()
+
+    def handle_signal(signum, frame):
+        logger.info("Stopping after the current task")
+        scheduler.stop()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    try:
+        scheduler.run_forever()
+    finally:
+        status_server.close()
+        scheduler.orchestrator.close()
+        llm_state['service'].close()
@@ -0,0 +1,120 @@
+import hashlib
+import logging
+import re
+from collections import Counter
+from typing import Iterable, Optional, Set
+
+from common.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+KEEP_SECTION_PATTERN = re.compile(
+    r"requirement|qualification|responsibilit|skill|experience|what you.?ll do|what you will do|you have|you bring|must have|"
+    r"nice to have|preferred|about the role|the role|duties|accountabilit|what we.?re looking for|looking for|job description|"
+    r"your impact|what you.?ll need|who you are",
+    re.IGNORECASE
+)
+DROP_SECTION_PATTERN = re.compile(
+    r"benefit|perk|what we offer|we offer|about us|about the company|about [a-z0-9&.\- ]{2,30}$|who we are|our company|equal opportunit|"
+    r"\beeo\b|diversity|inclusion|how to apply|compensation|salary|pay range|privacy|our culture|why join|life at|accommodation",
+    re.IGNORECASE
+)
+BOILERPLATE_PATTERN = re.compile(
+    r"equal opportunity employer|without regard to (race|age|gender)|reasonable accommodation|e-verify|"
+    r"all qualified applicants will receive|we are an equal|personal data .* (collected|used)|privacy (policy|notice)",
+    re.IGNORECASE
+)
+MAX_HEADING_WORDS = 8
+MAX_BARE_HEADING_WORDS = 5
+BULLET_CHARS = '•-*·–▪●'
+MIN_BOILERPLATE_CHARS = 40
+# Below this share of the body lines kept, the compacted text is more likely a wrong guess than a summary
+MIN_KEPT_LINE_SHARE = 0.25
+
+
+def _paragraph_key(paragraph: str) -> str:
+    normalized = re.sub(r'\W+', ' ', paragraph.lower()).strip()
+    return hashlib.md5(normalized.encode('utf-8')).hexdigest()
+
+
+def _is_heading(line: str) -> bool:
+    line = line.strip()
+    words = line.split()
+    if not words or len(words) > MAX_HEADING_WORDS or line[0] in BULLET_CHARS:
+        return False
+    if line.endswith(':'):
+        return True
+    # Headings without a colon are short, unpunctuated and name a known section
+    return len(words) <= MAX_BARE_HEADING_WORDS and not line.endswith(('.', '!', '?', ',')) and \
+        bool(KEEP_SECTION_PATTERN.search(line) or DROP_SECTION_PATTERN.search(line))
+
+
+def truncate_to_tokens(text: str, max_tokens: Optional[int]) -> str:
+    if not max_tokens or estimate_tokens(text) <= max_tokens:
+        return text
+    max_chars = max_tokens * 4
+    truncated = text[:max_chars]
+    # Prefer cutting at a line boundary so the model does not see half a sentence
+    last_newline = truncated.rfind('\n')
+    if last_newline > max_chars // 2:
+        truncated = truncated[:last_newline]
+    return truncated
+
+
+class DescriptionCompactor:
+    """Strips boilerplate from job descriptions and fits them into a token budget."""
+
+    def __init__(self, max_tokens: Optional[int] = None, min_boilerplate_docs: int = 3):
+        self.max_tokens = max_tokens
+        self.min_boilerplate_docs = min_boilerplate_docs
+        self.paragraph_doc_counts = Counter()
+        self.fitted_keys: Set[str] = set()
+
+    def reset(self):
+        self.paragraph_doc_counts.clear()
+        self.fitted_keys.clear()
+
+    def fit(self, descriptions: Iterable[str], keys: Iterable[str]):
+        # Each distinct description counts once, keyed on its hash, so an ad reposted under several job ids
+        # cannot reach min_boilerplate_docs on its own and lose its requirements
+        for key, description in zip(keys, descriptions):
+            if not description or key in self.fitted_keys:
+                continue
+            self.fitted_keys.add(key)
+            keys = {_paragraph_key(line) for line in description.splitlines() if len(line.strip()) >= MIN_BOILERPLATE_CHARS}
+            self.paragraph_doc_counts.update(keys)
+
+    def _is_boilerplate(self, line: str) -> bool:
+        if BOILERPLATE_PATTERN.search(line):
+            return True
+        if len(line.strip()) < MIN_BOILERPLATE_CHARS:
+            return False
+        return self.paragraph_doc_counts[_paragraph_key(line)] >= self.min_boilerplate_docs
+
+    def compact(self, description: str, max_tokens: Optional[int] = None) -> str:
+        max_tokens = max_tokens or self.max_tokens
+        if not description:
+            return description
+
+        kept_lines = []
+        keep_section = True
+        body_lines = kept_body_lines = 0
+        for line in description.splitlines():
+            if not line.strip():
+                continue
+            if _is_heading(line):
+                heading = line.strip().rstrip(':')
+                keep_section = bool(KEEP_SECTION_PATTERN.search(heading)) or not DROP_SECTION_PATTERN.search(heading)
+                if keep_section:
+                    kept_lines.append(line.strip())
+                continue
+            body_lines += 1
+            if keep_section and not self._is_boilerplate(line):
+                kept_lines.append(line.strip())
+                kept_body_lines += 1
+
+        compacted = '\n'.join(kept_lines)
+        if not compacted.strip() or kept_body_lines < body_lines * MIN_KEPT_LINE_SHARE:
+            # Section detection threw away most of the text, fall back to the raw text
+            compacted = description
+        return truncate_to_tokens(compacted, max_tokens)
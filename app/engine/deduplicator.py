@@ -0,0 +1,104 @@
+import logging
+import re
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"[a-z0-9+#]+")
+MAX_SHINGLE_HASH = np.uint64(0xFFFFFFFF)
+
+JobKey = Tuple[Hashable, str, str]  # (scope, site, job id)
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index of job postings, mapping each posting to the first near-identical one it has seen.
+
+    Postings are compared on the word shingles of their company, title and description, so the same job
+    found on several sites, by several queries or reposted under a new id ends up with one canonical posting.
+    Postings only cluster within the same scope, e.g. the candidate profile their verdict depends on.
+    Only the canonical posting of each cluster is kept in the LSH buckets, so a large cluster of reposts costs one
+    comparison per bucket hit rather than one per posting in the cluster.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 16, shingle_size: int = 4, min_words: int = 20,
+                 seed: int = 1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.min_words = min_words
+        # Multiply-shift hash family: (a * x + b) >> 32 over uint64 with odd a
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self._buckets: Dict[Tuple[Hashable, int, bytes], List[JobKey]] = defaultdict(list)
+        # Signatures of canonical postings only
+        self._signatures: Dict[JobKey, np.ndarray] = {}
+        self._canonical: Dict[JobKey, JobKey] = {}
+        self._verdicts: Dict[JobKey, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._canonical)
+
+    def reset(self):
+        self._buckets.clear()
+        self._signatures.clear()
+        self._canonical.clear()
+        self._verdicts.clear()
+
+    def signature(self, company: str, title: str, description: str) -> Optional[np.ndarray]:
+        words = WORD_PATTERN.findall(f"{company or ''} {title or ''} {description or ''}".lower())
+        # Without a description only company and title are left, which is not enough to tell two openings apart
+        if len(words) < self.min_words:
+            return None
+        size = min(self.shingle_size, len(words))
+        shingles = {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+        hashes = np.fromiter((hash(shingle) for shingle in shingles), dtype=np.int64, count=len(shingles)).view(np.uint64) & MAX_SHINGLE_HASH
+        with np.errstate(over='ignore'):
+            return ((hashes[:, None] * self._a + self._b) >> np.uint64(32)).min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, scope: Hashable, signature: np.ndarray) -> List[Tuple[Hashable, int, bytes]]:
+        return [(scope, band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def add(self, key: JobKey, company: str, title: str, description: str) -> JobKey:
+        # Returns the canonical posting of the cluster the job joins, the job itself when it starts a new one
+        if key in self._canonical:
+            return self._canonical[key]
+        signature = self.signature(company, title, description)
+        if signature is None:
+            self._canonical[key] = key
+            return key
+
+        band_keys = self._band_keys(key[0], signature)
+        canonical = key
+        best_similarity = self.threshold
+        candidates = {candidate for band_key in band_keys for candidate in self._buckets.get(band_key, ())}
+        for candidate in candidates:
+            similarity = float(np.mean(self._signatures[candidate] == signature))
+            if similarity >= best_similarity:
+                canonical, best_similarity = candidate, similarity
+
+        self._canonical[key] = canonical
+        if canonical == key:
+            self._signatures[key] = signature
+            for band_key in band_keys:
+                self._buckets[band_key].append(key)
+        return canonical
+
+    def canonical(self, key: JobKey) -> JobKey:
+        return self._canonical.get(key, key)
+
+    def verdict(self, key: JobKey) -> Optional[str]:
+        return self._verdicts.get(self.canonical(key))
+
+    def record_verdicts(self, scope: Hashable, site: str, verdicts: Dict[Hashable, str]):
+        for job_id, verdict in verdicts.items():
+            key = (scope, site, str(job_id))
+            if self._canonical.get(key) == key:
+                self._verdicts[key] = verdict
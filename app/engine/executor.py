@@ -1,66 +1,351 @@
+import itertools
 import logging
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
 import pandas as pd
 from tqdm import tqdm
+from common.blob_store import DESCRIPTIONS
+from common.metrics import METRICS
+from common.tokens import estimate_tokens
+from engine.compactor import DescriptionCompactor
+from engine.deduplicator import JobKey, NearDuplicateIndex
 from engine.models import Task
+from engine.prefilter import LexicalPreFilter
 from scrapers.job_attribute import JobAttr
-from services.llm_service import LLMService
+from scrapers.job_record import JobRecord
+from services.llm_service import LLMService, VALID_VERDICTS
+from services.run_journal import TaskJournal
 
 logger = logging.getLogger(__name__)
 
 class TaskExecutor:
-    def __init__(self, llm_service: LLMService):
+    def __init__(self, llm_service: LLMService, max_workers: int = 1, compactor: Optional[DescriptionCompactor] = None,
+                 streaming: bool = False, queue_size: int = 100, chunk_size: int = 8, deduplicator: Optional[NearDuplicateIndex] = None,
+                 prefilter_warmup: int = 50):
         self.llm_service = llm_service
+        self.max_workers = max(1, max_workers)
+        self.compactor = compactor
+        self.deduplicator = deduplicator
+        self.streaming = streaming
+        self.queue_size = max(1, queue_size)
+        # Streamed jobs are pre-filtered and compacted in chunks of this size, and never in chunks smaller than an LLM batch
+        self.chunk_size = max(1, chunk_size, llm_service.batch_size)
+        # Streamed chunks are held back until the pre-filter's IDF has seen this many jobs, so early chunks are not judged on a few documents
+        self.prefilter_warmup = max(0, prefilter_warmup)
+
+    @staticmethod
+    def _with_descriptions(df_jobs: pd.DataFrame) -> pd.DataFrame:
+        # Frames passed between stages only carry the description hash, the text is loaded for the jobs being classified
+        descriptions = DESCRIPTIONS.get_many(df_jobs[JobAttr.DESC_HASH])
+        return df_jobs.assign(**{JobAttr.JOB_DESC: df_jobs[JobAttr.DESC_HASH].map(descriptions).fillna('')})
+
+    def _compact_descriptions(self, task: Task, df_jobs: pd.DataFrame) -> pd.DataFrame:
+        if self.compactor is None or df_jobs.empty:
+            return df_jobs
+        budget = self.llm_service.job_token_budget(task.work_exp, task.skillset)
+        if self.compactor.max_tokens:
+            budget = min(budget, self.compactor.max_tokens)
+        raw_tokens = df_jobs[JobAttr.JOB_DESC].fillna('').map(estimate_tokens).sum()
+        df_jobs = df_jobs.assign(**{JobAttr.JOB_DESC: df_jobs[JobAttr.JOB_DESC].fillna('').map(lambda desc: self.compactor.compact(desc, budget))})
+        compacted_tokens = df_jobs[JobAttr.JOB_DESC].map(estimate_tokens).sum()
+        logger.info(f"Compacted job descriptions from {raw_tokens} to {compacted_tokens} token(s) with a budget of {budget} per job")
+        return df_jobs
+
+    def reset(self):
+        # Near-duplicate clusters and boilerplate counts are kept for the length of a run
+        if self.deduplicator is not None:
+            self.deduplicator.reset()
+        if self.compactor is not None:
+            self.compactor.reset()
+
+    def _deduplicate(self, task: Task, df_to_classify: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, JobKey]]:
+        # Only the first posting of each near-duplicate cluster goes to the LLM, the others take its verdict in _fan_out
+        if self.deduplicator is None or df_to_classify.empty:
+            return df_to_classify, {}
+        scope = (task.skillset, task.work_exp)
+        followers = {}
+        for job_id, company, job_title, job_description in zip(df_to_classify[JobAttr.JOB_ID], df_to_classify[JobAttr.COMPANY],
+                                                               df_to_classify[JobAttr.JOB_TITLE], df_to_classify[JobAttr.JOB_DESC]):
+            key = (scope, task.site_name, str(job_id))
+            canonical = self.deduplicator.add(key, company, job_title, job_description)
+            if canonical != key:
+                followers[job_id] = canonical
+        METRICS.inc('near_duplicates_total', len(followers), site=task.site_name)
+        return df_to_classify[~df_to_classify[JobAttr.JOB_ID].isin(followers)], followers
+
+    def _fan_out(self, task: Task, results: Dict[str, str], followers: Dict[str, JobKey], journal: Optional[TaskJournal] = None):
+        if self.deduplicator is None:
+            return
+        # Canonical postings of earlier tasks already have their verdict in the index
+        self.deduplicator.record_verdicts((task.skillset, task.work_exp), task.site_name, results)
+        fanned_out = {}
+        for job_id, canonical in followers.items():
+            verdict = self.deduplicator.verdict(canonical)
+            if verdict is not None and verdict.strip().lower() in VALID_VERDICTS:
+                fanned_out[job_id] = verdict
+        results.update(fanned_out)
+        if journal is not None and fanned_out:
+            journal.record_verdicts(fanned_out)
+        if followers:
+            logger.info(f"Near-duplicate stats: {len(followers)} job(s) matched an earlier posting, {len(fanned_out)} took its verdict, "
+                        f"saving {len(followers)} LLM call(s)")
+
+    def _ask(self, task: Task, jobs: Dict[str, str], journal: Optional[TaskJournal] = None, raw_descriptions: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        # Verdicts are cached under the normalized raw description, the compacted text sent to the LLM changes with each run's corpus
+        raw_descriptions = raw_descriptions or {}
+        try:
+            if len(jobs) == 1:
+                job_id, job_description = next(iter(jobs.items()))
+                results = {job_id: self.llm_service.ask_llm(task.work_exp, task.skillset, job_description, cache_text=raw_descriptions.get(job_id))}
+            else:
+                results = self.llm_service.ask_llm_batch(task.work_exp, task.skillset, jobs, cache_texts=raw_descriptions)
+        except Exception as e:
+            logger.error(e)
+            return {}
+        if journal is not None:
+            journal.record_verdicts({job_id: verdict for job_id, verdict in results.items() if verdict.strip().lower() in VALID_VERDICTS})
+        return results
 
-    def execute(self, task: Task, scraper, history: list) -> pd.DataFrame:
-        df_jobs = scraper.search(task.search_queries)
+    def _make_units(self, task: Task, df_jobs: pd.DataFrame) -> List[Dict[str, str]]:
+        jobs = dict(zip(df_jobs[JobAttr.JOB_ID], df_jobs[JobAttr.JOB_DESC]))
+        if self.llm_service.batch_size > 1:
+            units = self.llm_service.make_batches(task.work_exp, task.skillset, jobs)
+            logger.info(f"Packed {len(jobs)} job(s) into {len(units)} LLM batch(es)")
+            return units
+        return [{job_id: job_description} for job_id, job_description in jobs.items()]
+
+    def _classify_jobs(self, task: Task, df_jobs: pd.DataFrame, journal: Optional[TaskJournal] = None,
+                       raw_descriptions: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        units = self._make_units(task, df_jobs)
+
+        results = {}
+        with tqdm(total=len(df_jobs), desc="LLM Matching Loop") as progress:
+            if self.max_workers == 1:
+                for unit in units:
+                    results.update(self._ask(task, unit, journal, raw_descriptions))
+                    progress.update(len(unit))
+                return results
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {pool.submit(self._ask, task, unit, journal, raw_descriptions): len(unit) for unit in units}
+                for future in as_completed(futures):
+                    results.update(future.result())
+                    progress.update(futures[future])
+        return results
+
+    @staticmethod
+    def _resume(task: Task, scraper, history: Set[str], journal: Optional[TaskJournal]) -> Tuple[list, Set[str], Set[str], List[JobRecord]]:
+        # Returns (queries to run, ids the scraper skips, ids filtered from the result, jobs replayed from the journal)
+        if journal is None:
+            return task.search_queries, history, history, []
+        replayed = journal.jobs()
+        replayed_ids = {job.job_id for job in replayed}
+        queries = journal.attach(scraper, task.search_queries)
+        # Jobs of this run stay in the result even when an earlier attempt already saved them to history
+        return queries, set(history) | replayed_ids, set(history) - replayed_ids, replayed
+
+    @staticmethod
+    def scrape(task: Task, scraper, history: Set[str], journal: Optional[TaskJournal] = None) -> pd.DataFrame:
+        queries, scraper_history, history, replayed = TaskExecutor._resume(task, scraper, history, journal)
+        with METRICS.timer('task_stage_seconds', site=task.site_name, stage='scrape'):
+            df_jobs = scraper.search(queries, scraper_history) if queries else None
+        if replayed:
+            df_jobs = pd.concat([JobRecord.to_frame(replayed), df_jobs], ignore_index=True).drop_duplicates(subset=[JobAttr.JOB_ID])
+        if df_jobs is None:
+            return pd.DataFrame()
         df_jobs['site'] = task.site_name
         if history:
             logger.info("Filter out jobs that already being searched previously")
             df_jobs = df_jobs[~df_jobs[JobAttr.JOB_ID].isin(history)]
 
         logging.info(f"Searched job count: {df_jobs.shape[0]}")
+        METRICS.inc('jobs_scraped_total', df_jobs.shape[0], site=task.site_name)
+        return df_jobs
+
+    def execute(self, task: Task, scraper, history: Set[str], journal: Optional[TaskJournal] = None) -> pd.DataFrame:
+        with METRICS.timer('task_stage_seconds', site=task.site_name, stage='total'):
+            if self.streaming and task.llm_filter:
+                return self.execute_streaming(task, scraper, history, journal)
+            return self.classify(task, self.scrape(task, scraper, history, journal), journal)
+
+    @staticmethod
+    def _record_verdict_metrics(task: Task, df_jobs: pd.DataFrame):
+        for verdict, count in df_jobs['llm_comment'].value_counts().items():
+            METRICS.inc('jobs_classified_total', int(count), site=task.site_name, verdict=verdict)
 
+    def _iter_chunks(self, task: Task, scraper, history: Set[str], journal: Optional[TaskJournal] = None) -> Iterator[pd.DataFrame]:
+        queries, scraper_history, history, replayed = self._resume(task, scraper, history, journal)
+        stream = scraper.iter_jobs(queries, scraper_history, max_pending=self.queue_size) if queries else iter(())
+        seen_ids = set(history or ())
+        chunk = []
+        try:
+            for job in itertools.chain(replayed, stream):
+                if job.job_id in seen_ids:
+                    continue
+                seen_ids.add(job.job_id)
+                chunk.append(job)
+                if len(chunk) >= self.chunk_size:
+                    yield JobRecord.to_frame(chunk).assign(site=task.site_name)
+                    chunk = []
+        finally:
+            if queries:
+                stream.close()
+        if chunk:
+            yield JobRecord.to_frame(chunk).assign(site=task.site_name)
+
+    def execute_streaming(self, task: Task, scraper, history: Set[str], journal: Optional[TaskJournal] = None) -> pd.DataFrame:
+        # LLM calls are submitted chunk by chunk while the scraper keeps filling the bounded job queue
+        logger.info(f"Start streaming jobs to the LLM with {self.max_workers} worker(s)")
+        profile = task.skillset + "\n" + task.work_exp
+        known_verdicts = journal.verdicts() if journal is not None else {}
+        frames = []
+        results = dict(known_verdicts)
+        futures = []
+        followers = {}
+        # IDF comes from every job streamed so far, counted incrementally
+        prefilter = LexicalPreFilter(task.prefilter_threshold) if task.prefilter_threshold is not None else None
+        # Chunks held back until the pre-filter has counted prefilter_warmup jobs, None once it has
+        held_back = [] if prefilter is not None and self.prefilter_warmup else None
+        num_rejected = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool, tqdm(desc="LLM Matching Loop") as progress:
+            def process_chunk(df_chunk: pd.DataFrame, df_text: pd.DataFrame, fit: bool = True):
+                nonlocal num_rejected
+                df_to_classify = df_text
+                if prefilter is not None:
+                    df_to_classify, df_rejected, scores = prefilter.split(df_text, JobAttr.JOB_DESC, profile, fit=fit)
+                    df_chunk = df_chunk.assign(prefilter_score=scores)
+                    results.update({job_id: 'Poor' for job_id in df_rejected[JobAttr.JOB_ID]})
+                    num_rejected += len(df_rejected)
+                    METRICS.inc('prefilter_rejected_total', len(df_rejected), site=task.site_name)
+                df_to_classify = df_to_classify[~df_to_classify[JobAttr.JOB_ID].isin(known_verdicts)]
+                df_to_classify, chunk_followers = self._deduplicate(task, df_to_classify)
+                followers.update(chunk_followers)
+
+                raw_descriptions = dict(zip(df_to_classify[JobAttr.JOB_ID], df_to_classify[JobAttr.JOB_DESC]))
+                if self.compactor is not None:
+                    self.compactor.fit(df_text[JobAttr.JOB_DESC], df_text[JobAttr.DESC_HASH])
+                    df_to_classify = self._compact_descriptions(task, df_to_classify)
+                    tokens_sent = dict(zip(df_to_classify[JobAttr.JOB_ID], df_to_classify[JobAttr.JOB_DESC].map(estimate_tokens)))
+                    df_chunk = df_chunk.assign(job_tokens_sent=df_chunk[JobAttr.JOB_ID].map(tokens_sent).fillna(0).astype(int))
+
+                frames.append(df_chunk)
+                progress.total = (progress.total or 0) + len(df_to_classify)
+                progress.refresh()
+                for unit in self._make_units(task, df_to_classify):
+                    future = pool.submit(self._ask, task, unit, journal, raw_descriptions)
+                    future.add_done_callback(lambda _, size=len(unit): progress.update(size))
+                    futures.append(future)
+
+            # Closing the chunks on a failure stops the scraper thread instead of leaving it blocked on the full queue
+            with closing(self._iter_chunks(task, scraper, history, journal)) as chunks:
+                for df_chunk in chunks:
+                    df_text = self._with_descriptions(df_chunk)
+                    if held_back is None:
+                        process_chunk(df_chunk, df_text)
+                        continue
+                    prefilter.fit(df_text[JobAttr.JOB_DESC])
+                    held_back.append((df_chunk, df_text))
+                    if prefilter.n_docs >= self.prefilter_warmup:
+                        for held_chunk, held_text in held_back:
+                            process_chunk(held_chunk, held_text, fit=False)
+                        held_back = None
+            # Streams shorter than the warm-up are scored once they end
+            for held_chunk, held_text in held_back or ():
+                process_chunk(held_chunk, held_text, fit=False)
+
+            for future in futures:
+                results.update(future.result())
+        self._fan_out(task, results, followers, journal)
+
+        if not frames:
+            return pd.DataFrame()
+        df_jobs = pd.concat(frames, ignore_index=True)
+        logger.info(f"Searched job count: {df_jobs.shape[0]}")
+        METRICS.inc('jobs_scraped_total', df_jobs.shape[0], site=task.site_name)
+        if task.prefilter_threshold is not None:
+            logger.info(f"Pre-filter stats: {num_rejected}/{len(df_jobs)} job(s) scored below {task.prefilter_threshold} "
+                        f"and were labelled Poor, saving {num_rejected} LLM call(s)")
+        if self.llm_service.cache is not None:
+            logger.info(f"LLM verdict cache stats: {self.llm_service.cache.stats()}")
+        df_jobs = self._apply_verdicts(df_jobs, results)
+        self._record_verdict_metrics(task, df_jobs)
+        return df_jobs
+
+    def _apply_verdicts(self, df_jobs: pd.DataFrame, results: Dict[str, str]) -> pd.DataFrame:
+        good_ids = []
+        moderate_ids = []
+        poor_ids = []
+        llm_response_normal_ids = []
+        for _, row in df_jobs.iterrows():
+            job_id = row[JobAttr.JOB_ID]
+            result = results.get(job_id)
+            if result is None:
+                continue
+
+            if result.lower() == 'good':
+                good_ids.append(job_id)
+                llm_response_normal_ids.append(job_id)
+            elif result.lower() == 'moderate':
+                moderate_ids.append(job_id)
+                llm_response_normal_ids.append(job_id)
+            elif result.lower() == 'poor':
+                poor_ids.append(job_id)
+                llm_response_normal_ids.append(job_id)
+            else:
+                logger.error("LLM cannot response properly. ")
+                logger.info(f"LLM response: {result}")
+                logger.info(f"Job Title: {row[JobAttr.JOB_TITLE]}, Company: {row[JobAttr.COMPANY]}, URL: {row[JobAttr.JOB_URL]}")
+
+        df_jobs = df_jobs[df_jobs[JobAttr.JOB_ID].isin(llm_response_normal_ids)]
+        df_jobs['validate_result'] = False
+        df_jobs.loc[df_jobs[JobAttr.JOB_ID].isin(good_ids + moderate_ids), 'validate_result'] = True
+        df_jobs.loc[df_jobs[JobAttr.JOB_ID].isin(good_ids), 'llm_comment'] = 'Good'
+        df_jobs.loc[df_jobs[JobAttr.JOB_ID].isin(moderate_ids), 'llm_comment'] = 'Moderate'
+        df_jobs.loc[df_jobs[JobAttr.JOB_ID].isin(poor_ids), 'llm_comment'] = 'Poor'
+        return df_jobs
+
+    def classify(self, task: Task, df_jobs: pd.DataFrame, journal: Optional[TaskJournal] = None) -> pd.DataFrame:
         if df_jobs.empty:
             return df_jobs
 
         if task.llm_filter:
-            logger.info("Start asking LLM loop")
-            good_ids = []
-            moderate_ids = []
-            poor_ids = []
-            llm_response_normal_ids = []
-            for _, row in tqdm(df_jobs.iterrows(), total=len(df_jobs), desc="LLM Matching Loop"):
-                job_id = row[JobAttr.JOB_ID]
-                job_description = row[JobAttr.JOB_DESC]
-                try:
-                    result = self.llm_service.ask_llm(task.work_exp, task.skillset, job_description)
-                except Exception as e:
-                    logger.error(e)
-                    continue
+            logger.info(f"Start asking LLM loop with {self.max_workers} worker(s)")
+            results = {}
+            df_text = self._with_descriptions(df_jobs)
+            df_to_classify = df_text
+            if task.prefilter_threshold is not None:
+                df_to_classify, df_rejected, scores = LexicalPreFilter(task.prefilter_threshold).split(df_text, JobAttr.JOB_DESC, task.skillset + "\n" + task.work_exp)
+                df_jobs = df_jobs.assign(prefilter_score=scores)
+                results.update({job_id: 'Poor' for job_id in df_rejected[JobAttr.JOB_ID]})
+                METRICS.inc('prefilter_rejected_total', len(df_rejected), site=task.site_name)
+                logger.info(f"Pre-filter stats: {len(df_rejected)}/{len(scores)} job(s) scored below {task.prefilter_threshold} "
+                            f"and were labelled Poor, saving {len(df_rejected)} LLM call(s)")
 
-                if result.lower() == 'good':
-                    good_ids.append(job_id)
-                    llm_response_normal_ids.append(job_id)
-                elif result.lower() == 'moderate':
-                    moderate_ids.append(job_id)
-                    llm_response_normal_ids.append(job_id)
-                elif result.lower() == 'poor':
-                    poor_ids.append(job_id)
-                    llm_response_normal_ids.append(job_id)
-                else:
-                    logger.error("LLM cannot response properly. ")
-                    logger.info(f"LLM response: {result}")
-                    logger.info(f"Job Title: {row.title}, Company: {row.company}, URL: {row.job_url}")
-
-            df_jobs = df_jobs[df_jobs[JobAttr.JOB_ID].isin(llm_response_normal_ids)]
-            df_jobs['validate_result'] = False
-            df_jobs.loc[df_jobs[JobAttr.JOB_ID].isin(good_ids + moderate_ids), 'validate_result'] = True
-            df_jobs.loc[df_jobs[JobAttr.JOB_ID].isin(good_ids), 'llm_comment'] = 'Good'
-            df_jobs.loc[df_jobs[JobAttr.JOB_ID].isin(moderate_ids), 'llm_comment'] = 'Moderate'
-            df_jobs.loc[df_jobs[JobAttr.JOB_ID].isin(poor_ids), 'llm_comment'] = 'Poor'
+            if journal is not None:
+                known_verdicts = journal.verdicts()
+                results.update(known_verdicts)
+                df_to_classify = df_to_classify[~df_to_classify[JobAttr.JOB_ID].isin(known_verdicts)]
+                if known_verdicts:
+                    logger.info(f"Reusing {len(known_verdicts)} verdict(s) from the run journal")
+            df_to_classify, followers = self._deduplicate(task, df_to_classify)
+
+            raw_descriptions = dict(zip(df_to_classify[JobAttr.JOB_ID], df_to_classify[JobAttr.JOB_DESC]))
+            if self.compactor is not None:
+                self.compactor.fit(df_text[JobAttr.JOB_DESC], df_text[JobAttr.DESC_HASH])
+                df_to_classify = self._compact_descriptions(task, df_to_classify)
+                tokens_sent = dict(zip(df_to_classify[JobAttr.JOB_ID], df_to_classify[JobAttr.JOB_DESC].map(estimate_tokens)))
+                df_jobs = df_jobs.assign(job_tokens_sent=df_jobs[JobAttr.JOB_ID].map(tokens_sent).fillna(0).astype(int))
+
+            with METRICS.timer('task_stage_seconds', site=task.site_name, stage='classify'):
+                results.update(self._classify_jobs(task, df_to_classify, journal, raw_descriptions))
+            self._fan_out(task, results, followers, journal)
+            if self.llm_service.cache is not None:
+                logger.info(f"LLM verdict cache stats: {self.llm_service.cache.stats()}")
+            df_jobs = self._apply_verdicts(df_jobs, results)
+            self._record_verdict_metrics(task, df_jobs)
         else:
             df_jobs['validate_result'] = True
 
-        df_jobs = df_jobs.drop(columns=[JobAttr.JOB_DESC])
-
-        return df_jobs
\ No newline at end of file
+        return df_jobs
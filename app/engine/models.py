@@ -43,4 +43,6 @@ class Task:
     work_exp: str
     llm_filter: bool
     site_name: str
-    search_queries: List[SearchQuery]
\ No newline at end of file
+    search_queries: List[SearchQuery]
+    prefilter_threshold: Optional[float] = None
+    name: Optional[str] = None
@@ -1,31 +1,70 @@
 import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 import pandas as pd
+from typing import TYPE_CHECKING, Iterable, Optional, Tuple
 from scrapers.job_attribute import JobAttr
 from engine.models import Task, SearchQuery, JobType, ExpLevel
 from engine.executor import TaskExecutor
 from services.config_service import ConfigService
 from services.history_service import JobHistoryService
+from services.run_journal import RunJournal
 from services.scraper_factory import ScraperFactory
+from common.blob_store import DEFAULT_BLOB_PATH, DESCRIPTIONS
 from common.dotdict import DotDict
+from common.metrics import METRICS
 import os
 
+if TYPE_CHECKING:
+    # Both pull in heavy dependencies (DrissionPage, pyarrow) that a run without a browser pool or parquet results never needs
+    from scrapers.browser_pool import BrowserPool
+    from services.results_store import ResultsStore
+
 logger = logging.getLogger(__name__)
 
 
+def scrape_task_in_worker(config: DotDict, task: Task, history: set, watermarks: dict, worker_id: int, run_id: str,
+                          task_index: int) -> Tuple[pd.DataFrame, dict, dict]:
+    # Runs in a separate process with its own browser instance and its own connection to the run journal,
+    # the metrics it collected and the job ids listed per query are sent back with the result
+    METRICS.reset()
+    DESCRIPTIONS.configure((config.get('descriptions') or {}).get('path', DEFAULT_BLOB_PATH))
+    scraper = ScraperFactory(config).create_scraper(task.site_name, worker_id=worker_id)
+    scraper.watermarks = watermarks
+    journal = RunJournal(run_id)
+    try:
+        df = TaskExecutor.scrape(task, scraper, history, journal.for_task(task_index))
+        return df, METRICS.snapshot(), scraper.listed_job_ids
+    finally:
+        journal.close()
+
+
 class Orchestrator:
-    def __init__(self, config_service: ConfigService, history_service: JobHistoryService, scraper_factory: ScraperFactory, task_executor: TaskExecutor):
+    def __init__(self, config_service: ConfigService, history_service: JobHistoryService, scraper_factory: ScraperFactory, task_executor: TaskExecutor,
+                 browser_pool: Optional['BrowserPool'] = None, results_store: Optional['ResultsStore'] = None):
         self.config_service = config_service
         self.history_service = history_service
         self.scraper_factory = scraper_factory
         self.task_executor = task_executor
+        self.browser_pool = browser_pool
+        self.results_store = results_store
         self.config = self.config_service.get_config()
+        self.journal: Optional[RunJournal] = None
 
-    def _create_tasks(self):
+    @staticmethod
+    def task_name(task_config, index: int) -> str:
+        return task_config.get('name') or f"{task_config['site_name']}-{index + 1}"
+
+    def _create_tasks(self, task_names: Optional[Iterable[str]] = None):
         logger.info("Creating tasks")
+        task_names = set(task_names) if task_names is not None else None
         task_list = []
-        for task_config in self.config.tasks:
+        for index, task_config in enumerate(self.config.tasks):
             task = DotDict(task_config)
+            name = self.task_name(task, index)
+            if task_names is not None and name not in task_names:
+                continue
             with open(os.path.join('skillset', task.skillset), 'r', encoding='utf-8') as file:
                 skillset_str = file.read()
             with open(os.path.join('skillset', task.work_exp), 'r', encoding='utf-8') as file:
@@ -55,49 +94,149 @@ class Orchestrator:
                     work_exp=work_exp_str,
                     llm_filter=task.llm_filter,
                     site_name=task.site_name,
-                    search_queries=query_list
+                    search_queries=query_list,
+                    prefilter_threshold=task.get('prefilter_threshold'),
+                    name=name
                 )
             )
         logger.info(f"Created {len(task_list)} task(s)")
         return task_list
 
-    def run(self):
-        tasks = self._create_tasks()
+    def _handle_result(self, task: Task, df: pd.DataFrame, list_dfs: list):
+        if not df.empty:
+            list_dfs.append(df)
+            self.history_service.save_history(task.site_name, df[JobAttr.JOB_ID].tolist())
+
+    def _run_sequential(self, tasks) -> list:
         list_dfs = []
         for i, task in enumerate(tasks):
             logger.info(f"Executing task {i + 1}")
             scraper = self.scraper_factory.create_scraper(task.site_name)
-            history = []
-            if task.site_name == 'linkedin':
-                history = self.history_service.get_linkedin_history()
-            elif task.site_name == 'indeed':
-                history = self.history_service.get_indeed_history()
-            elif task.site_name == 'jobsdb':
-                history = self.history_service.get_jobsdb_history()
-
-            df = self.task_executor.execute(task, scraper, history)
-            if not df.empty:
-                list_dfs.append(df)
-                if task.site_name == 'linkedin':
-                    self.history_service.save_linkedin_history(df['Job ID'].tolist())
-                elif task.site_name == 'indeed':
-                    self.history_service.save_indeed_history(df['Job ID'].tolist())
-                elif task.site_name == 'jobsdb':
-                    self.history_service.save_jobsdb_history(df['Job ID'].tolist())
+            scraper.watermarks = self.history_service.get_watermarks(task.site_name)
+            history = self.history_service.get_history(task.site_name)
+
+            df = self.task_executor.execute(task, scraper, history, self.journal.for_task(i))
+            self._handle_result(task, df, list_dfs)
+            self.history_service.save_watermarks(task.site_name, scraper.listed_job_ids)
+        return list_dfs
+
+    def _run_parallel(self, tasks, parallel_config: DotDict) -> list:
+        max_workers = parallel_config.get('max_workers') or len(tasks)
+        per_site = parallel_config.get('per_site') or {}
+        logger.info(f"Executing {len(tasks)} task(s) in parallel with {max_workers} worker process(es), per-site limits: {dict(per_site)}")
+
+        list_dfs = []
+        pending = list(enumerate(tasks))
+        running = {}
+        free_worker_ids = list(range(max_workers))
+        site_running = Counter()
+
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            def submit_ready_tasks():
+                for item in list(pending):
+                    i, task = item
+                    if not free_worker_ids:
+                        break
+                    if site_running[task.site_name] >= per_site.get(task.site_name, 1):
+                        continue
+                    pending.remove(item)
+                    worker_id = free_worker_ids.pop(0)
+                    site_running[task.site_name] += 1
+                    logger.info(f"Executing task {i + 1} ({task.site_name}) on worker {worker_id}")
+                    history = self.history_service.get_history(task.site_name)
+                    watermarks = self.history_service.get_watermarks(task.site_name)
+                    future = pool.submit(scrape_task_in_worker, self.config, task, history, watermarks, worker_id, self.journal.run_id, i)
+                    running[future] = (i, task, worker_id)
+
+            submit_ready_tasks()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                finished = []
+                for future in done:
+                    i, task, worker_id = running.pop(future)
+                    free_worker_ids.append(worker_id)
+                    site_running[task.site_name] -= 1
+                    finished.append((i, task, future))
+                # Keep the browsers busy while the finished tasks go through the LLM stage
+                submit_ready_tasks()
+                for i, task, future in finished:
+                    try:
+                        df, worker_metrics, listed_job_ids = future.result()
+                        METRICS.merge(worker_metrics)
+                    except Exception as e:
+                        logger.error(f"Task {i + 1} failed: {e}")
+                        continue
+                    df = self.task_executor.classify(task, df, self.journal.for_task(i))
+                    self._handle_result(task, df, list_dfs)
+                    self.history_service.save_watermarks(task.site_name, listed_job_ids)
+
+        for i, task in pending:
+            logger.warning(f"Task {i + 1} was not executed as parallel.per_site allows no worker for {task.site_name}")
+        return list_dfs
+
+    def run(self, resume_run_id: Optional[str] = None, task_names: Optional[Iterable[str]] = None, keep_journal: bool = True):
+        # task_names limits the run to these tasks, a resumed run must be given the same ones,
+        # keep_journal=False deletes the journal once the run completes, a failed run always keeps it
+        self.config = self.config_service.get_config()
+        self.journal = RunJournal(resume_run_id, resume=resume_run_id is not None)
+        task_args = ''.join(f" --task {name}" for name in sorted(task_names or ()))
+        logger.info(f"{'Resuming' if resume_run_id else 'Starting'} run {self.journal.run_id}, "
+                    f"resume it with --resume {self.journal.run_id}{task_args} if it fails")
+        METRICS.reset()
+        try:
+            self._run(task_names)
+        finally:
+            self._export_metrics()
+            self.journal.close()
+        if not keep_journal:
+            self.journal.delete()
+
+    def _export_metrics(self):
+        metrics_config = self.config.get('metrics') or {}
+        if not metrics_config.get('enabled', True):
+            return
+        try:
+            METRICS.export(self.journal.run_id, json_dir=metrics_config.get('dir', 'metrics'), textfile_dir=metrics_config.get('textfile_dir'))
+        except Exception as e:
+            logger.error(f"Failed to export metrics: {e}")
+
+    def _run(self, task_names: Optional[Iterable[str]] = None):
+        self.task_executor.reset()
+        self.history_service.prune((self.config.get('history') or {}).get('retention_days'))
+        DESCRIPTIONS.prune((self.config.get('descriptions') or {}).get('retention_days'))
+        tasks = self._create_tasks(task_names)
+        parallel_config = self.config.get('parallel') or DotDict()
+        if parallel_config.get('enabled') and len(tasks) > 1:
+            list_dfs = self._run_parallel(tasks, parallel_config)
+        else:
+            list_dfs = self._run_sequential(tasks)
 
         if list_dfs:
             df_jobs = pd.concat(list_dfs, ignore_index=True)
             df_jobs = df_jobs.drop_duplicates(subset=['Job ID'])
-            columns = [
-                JobAttr.SEARCH_TITLE,
-                'site',
-                JobAttr.JOB_TITLE,
-                JobAttr.COMPANY,
-                JobAttr.JOB_URL,
-                JobAttr.LOCATION,
-            ]
-            if 'llm_comment' in df_jobs.columns:
-                columns.extend(['llm_comment', 'validate_result'])
-            df_jobs = df_jobs[columns]
-            df_jobs = df_jobs.sort_values(by=['site', JobAttr.SEARCH_TITLE, JobAttr.COMPANY])
-            df_jobs.to_csv(os.path.join('scrapped_jobs', f"{datetime.now().strftime('%Y-%m-%d_%H-%M')}.csv"), index=False)
+            if self.results_store is not None:
+                self.results_store.append(df_jobs, self.journal.run_id, self.journal.started_at.date())
+            if (self.config.get('results') or {}).get('csv', False):
+                self._export_csv(df_jobs)
+
+    def _export_csv(self, df_jobs: pd.DataFrame):
+        columns = [
+            JobAttr.SEARCH_TITLE,
+            'site',
+            JobAttr.JOB_TITLE,
+            JobAttr.COMPANY,
+            JobAttr.JOB_URL,
+            JobAttr.LOCATION,
+        ]
+        if 'llm_comment' in df_jobs.columns:
+            columns.extend(['llm_comment', 'validate_result'])
+        df_jobs = df_jobs[columns]
+        df_jobs = df_jobs.sort_values(by=['site', JobAttr.SEARCH_TITLE, JobAttr.COMPANY])
+        df_jobs.to_csv(os.path.join('scrapped_jobs', f"{datetime.now().strftime('%Y-%m-%d_%H-%M')}.csv"), index=False)
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+        if self.browser_pool is not None:
+            self.browser_pool.close()
+        DESCRIPTIONS.close()
@@ -0,0 +1,95 @@
+import logging
+import re
+from collections import Counter
+from typing import Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+STOP_WORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can could did do does doing down during each few
+for from further had has have having he her here hers herself him himself his how i if in into is it its itself just me more
+most my myself no nor not now of off on once only or other our ours ourselves out over own same she should so some such than
+that the their theirs them themselves then there these they this those through to too under until up very was we were what when
+where which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+
+def _term_counts(descriptions: Iterable) -> Tuple[np.ndarray, list, np.ndarray]:
+    # (doc, term, count) triples for each distinct term of each doc, docs numbered by their position in descriptions
+    doc_idx, terms, counts = [], [], []
+    for doc, text in enumerate(descriptions):
+        if not isinstance(text, str) or not text:
+            continue
+        doc_counts = Counter(token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS)
+        doc_idx.extend([doc] * len(doc_counts))
+        terms.extend(doc_counts)
+        counts.extend(doc_counts.values())
+    return np.asarray(doc_idx, dtype=np.int64), terms, np.asarray(counts, dtype=float)
+
+
+class LexicalPreFilter:
+    """TF-IDF cosine similarity between each job description and the candidate profile.
+
+    Document frequencies are counted incrementally, so a stream of jobs is scored against every job seen so far
+    without refitting the whole corpus for each chunk.
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.doc_freq = Counter()
+        self.n_docs = 0
+        self._profile = None
+        self._profile_counts = None
+
+    def fit(self, descriptions: pd.Series):
+        _, terms, _ = _term_counts(descriptions)
+        self.doc_freq.update(terms)
+        self.n_docs += len(descriptions)
+
+    def _idf(self, terms) -> np.ndarray:
+        doc_freq = np.fromiter((self.doc_freq.get(term, 0) for term in terms), dtype=float, count=len(terms))
+        return np.log((1 + self.n_docs) / (1 + doc_freq)) + 1
+
+    def _score_counts(self, doc_idx: np.ndarray, terms: list, counts: np.ndarray, n_docs: int, profile: str) -> np.ndarray:
+        if not terms:
+            return np.zeros(n_docs)
+        term_idx, vocab = pd.factorize(np.asarray(terms, dtype=object))
+        weights = (1 + np.log(counts)) * self._idf(vocab)[term_idx]
+        doc_norm = np.sqrt(np.bincount(doc_idx, weights=weights ** 2, minlength=n_docs))
+
+        if profile != self._profile:
+            _, profile_terms, profile_counts = _term_counts([profile])
+            self._profile, self._profile_counts = profile, (profile_terms, profile_counts)
+        profile_terms, profile_counts = self._profile_counts
+        profile_weight_all = (1 + np.log(profile_counts)) * self._idf(profile_terms)
+        profile_norm = np.sqrt(np.sum(profile_weight_all ** 2))
+
+        profile_idx = pd.Index(vocab).get_indexer(profile_terms)
+        in_vocab = profile_idx >= 0
+        profile_vector = np.zeros(len(vocab))
+        profile_vector[profile_idx[in_vocab]] = profile_weight_all[in_vocab]
+        dot = np.bincount(doc_idx, weights=weights * profile_vector[term_idx], minlength=n_docs)
+
+        denominator = doc_norm * profile_norm
+        return np.divide(dot, denominator, out=np.zeros(n_docs), where=denominator > 0)
+
+    def score(self, descriptions: pd.Series, profile: str) -> np.ndarray:
+        # Scored with the document frequencies fitted so far
+        return self._score_counts(*_term_counts(descriptions), len(descriptions), profile)
+
+    def split(self, df_jobs: pd.DataFrame, desc_column: str, profile: str, fit: bool = True):
+        # With fit the jobs are counted into the document frequencies before they are scored, tokenizing them once
+        descriptions = df_jobs[desc_column]
+        doc_idx, terms, counts = _term_counts(descriptions)
+        if fit:
+            self.doc_freq.update(terms)
+            self.n_docs += len(descriptions)
+        scores = self._score_counts(doc_idx, terms, counts, len(descriptions), profile)
+        # Jobs scraped without a description cannot be judged lexically, leave them to the LLM
+        has_text = descriptions.fillna('').astype(str).str.strip().ne('').to_numpy()
+        below = (scores < self.threshold) & has_text
+        return df_jobs[~below], df_jobs[below], scores
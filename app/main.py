@@ -1,51 +1,129 @@
 import argparse
 import logging
-import os
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_ollama import ChatOllama
 from engine.orchestrator import Orchestrator
+from common.blob_store import DEFAULT_BLOB_PATH, DESCRIPTIONS
+from engine.compactor import DescriptionCompactor
+from engine.deduplicator import NearDuplicateIndex
 from engine.executor import TaskExecutor
 from services.config_service import ConfigService
 from services.history_service import JobHistoryService
+from services.llm_providers import DEFAULT_CONTEXT_TOKENS, LLM_PROVIDERS
 from services.llm_service import LLMService
+from services.rate_limiter import RateLimiter
+from services.verdict_cache import VerdictCache
 from services.scraper_factory import ScraperFactory
 
 logger = logging.getLogger(__name__)
 
+# Default quotas per provider, can be overridden by llm.rate_limit in config.yml
+DEFAULT_RATE_LIMITS = {
+    'gemini': {'rpm': 15, 'tpm': 250000},
+    'ollama': {'rpm': None, 'tpm': None},
+}
+
+# Upper bound of tokens per job description, can be overridden by llm.compaction.max_job_tokens
+DEFAULT_MAX_JOB_TOKENS = {
+    'gemini': 3000,
+    'ollama': 2000,
+}
+
 def setup_llm(config):
-    logger.info("Setup LLM")
-    if config.llm.provider == 'ollama':
-        return ChatOllama(model=config.llm.model, temperature=0.2, num_ctx=8192)
-    elif config.llm.provider == 'gemini':
-        os.environ['GOOGLE_API_KEY'] = config.llm.api_key
-        return ChatGoogleGenerativeAI(
-            model=config.llm.model,
-            temperature=0.2,
-            max_tokens=None,
-            max_retries=3
-        )
-    else:
-        raise ValueError("Currently only support ollama and gemini")
+    logger.info(f"Setup LLM {config.llm.provider}")
+    return LLM_PROVIDERS.get(config.llm.provider)(config)
+
+def setup_rate_limiter(config) -> RateLimiter:
+    limits = dict(DEFAULT_RATE_LIMITS.get(config.llm.provider, {}))
+    limits.update(config.llm.get('rate_limit') or {})
+    logger.info(f"LLM rate limit for {config.llm.provider}: {limits}")
+    return RateLimiter(rpm=limits.get('rpm'), tpm=limits.get('tpm'))
+
+def setup_verdict_cache(config):
+    cache_config = config.llm.get('cache') or {}
+    if not cache_config.get('enabled', True):
+        return None
+    return VerdictCache(
+        db_path=cache_config.get('path', 'cache/llm_verdicts.db'),
+        ttl_days=cache_config.get('ttl_days', 30),
+        max_entries=cache_config.get('max_entries', 100000)
+    )
+
+def setup_compactor(config):
+    compaction_config = config.llm.get('compaction') or {}
+    if not compaction_config.get('enabled', True):
+        return None
+    max_tokens = compaction_config.get('max_job_tokens', DEFAULT_MAX_JOB_TOKENS.get(config.llm.provider))
+    return DescriptionCompactor(max_tokens=max_tokens, min_boilerplate_docs=compaction_config.get('min_boilerplate_docs', 3))
+
+def setup_deduplicator(config):
+    dedup_config = config.get('dedup') or {}
+    if not dedup_config.get('enabled', False):
+        return None
+    return NearDuplicateIndex(
+        threshold=dedup_config.get('threshold', 0.8),
+        num_perm=dedup_config.get('num_perm', 128),
+        bands=dedup_config.get('bands', 16),
+        shingle_size=dedup_config.get('shingle_size', 4),
+        min_words=dedup_config.get('min_words', 20)
+    )
+
+def setup_results_store(config):
+    results_config = config.get('results') or {}
+    if not results_config.get('parquet', True):
+        return None
+    # pyarrow is only imported when the parquet results are enabled
+    from services.results_store import ResultsStore
+    return ResultsStore(root=results_config.get('path', 'results'), compression=results_config.get('compression', 'zstd'))
+
+def setup_llm_service(config) -> LLMService:
+    return LLMService(
+        setup_llm(config),
+        model_name=config.llm.model,
+        rate_limiter=setup_rate_limiter(config),
+        cache=setup_verdict_cache(config),
+        max_retries=config.llm.get('max_retries', 5),
+        batch_size=config.llm.get('batch_size', 1),
+        context_tokens=config.llm.get('num_ctx', DEFAULT_CONTEXT_TOKENS.get(config.llm.provider, 8192))
+    )
+
+def setup_orchestrator(config_service: ConfigService, llm_service: LLMService, history_service: JobHistoryService, browser_pool) -> Orchestrator:
+    config = config_service.get_config()
+    DESCRIPTIONS.configure((config.get('descriptions') or {}).get('path', DEFAULT_BLOB_PATH))
+    streaming_config = config.get('streaming') or {}
+    task_executor = TaskExecutor(
+        llm_service,
+        max_workers=config.llm.get('max_workers', 1),
+        compactor=setup_compactor(config),
+        streaming=streaming_config.get('enabled', False),
+        queue_size=streaming_config.get('queue_size', 100),
+        chunk_size=streaming_config.get('chunk_size', 8),
+        prefilter_warmup=streaming_config.get('prefilter_warmup', 50),
+        deduplicator=setup_deduplicator(config)
+    )
+    return Orchestrator(
+        config_service=config_service,
+        history_service=history_service,
+        scraper_factory=ScraperFactory(config, browser_pool=browser_pool),
+        task_executor=task_executor,
+        browser_pool=browser_pool,
+        results_store=setup_results_store(config)
+    )
 
 if __name__ == '__main__':
+    # DrissionPage is only imported when main.py is run, not when the setup functions are imported
+    from scrapers.browser_pool import BrowserPool
+
     parser = argparse.ArgumentParser()
     parser.add_argument("--config", default="config/config.yml")
+    parser.add_argument("--resume", metavar="RUN_ID", help="Resume a failed run from its journal")
+    parser.add_argument("--task", metavar="NAME", action="append", help="Only run this task (repeatable), see `name` in tasks")
     args = parser.parse_args()
 
     config_service = ConfigService(config_path=args.config)
     config = config_service.get_config()
+    browser_pool = BrowserPool() if config.selenium.get('browser_pool', True) else None
+    orchestrator = setup_orchestrator(config_service, setup_llm_service(config), JobHistoryService(), browser_pool)
 
-    llm_client = setup_llm(config)
-    llm_service = LLMService(llm_client)
-    history_service = JobHistoryService()
-    scraper_factory = ScraperFactory(config)
-    task_executor = TaskExecutor(llm_service)
-
-    orchestrator = Orchestrator(
-        config_service=config_service,
-        history_service=history_service,
-        scraper_factory=scraper_factory,
-        task_executor=task_executor
-    )
-
-    orchestrator.run()
+    try:
+        orchestrator.run(resume_run_id=args.resume, task_names=args.task)
+    finally:
+        orchestrator.close()
@@ -0,0 +1,42 @@
+import argparse
+from datetime import date
+
+import pandas as pd
+
+from common.blob_store import BlobStore, DEFAULT_BLOB_PATH
+from scrapers.job_attribute import JobAttr
+from services.results_store import ResultsStore
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Query the Parquet results store")
+    parser.add_argument("--root", default="results")
+    parser.add_argument("--site", nargs='+')
+    parser.add_argument("--verdict", nargs='+', choices=['good', 'moderate', 'poor'])
+    parser.add_argument("--company", nargs='+')
+    parser.add_argument("--since", type=date.fromisoformat, help="First run date to include, YYYY-MM-DD")
+    parser.add_argument("--until", type=date.fromisoformat, help="Last run date to include, YYYY-MM-DD")
+    parser.add_argument("--columns", nargs='+', help="Columns to read, all of them by default")
+    parser.add_argument("--descriptions", nargs='?', const=DEFAULT_BLOB_PATH, metavar="BLOB_DB",
+                        help="Add the job descriptions, read from the description blob store")
+    parser.add_argument("--csv", metavar="PATH", help="Write the result to a CSV file instead of printing it")
+    args = parser.parse_args()
+
+    df_jobs = ResultsStore(root=args.root).query(
+        sites=args.site,
+        verdicts=args.verdict,
+        companies=args.company,
+        start_date=args.since,
+        end_date=args.until,
+        columns=args.columns
+    )
+    if args.descriptions and JobAttr.DESC_HASH in df_jobs.columns:
+        blob_store = BlobStore(args.descriptions)
+        descriptions = blob_store.get_many(df_jobs[JobAttr.DESC_HASH].dropna())
+        df_jobs[JobAttr.JOB_DESC] = df_jobs[JobAttr.DESC_HASH].map(descriptions)
+        blob_store.close()
+    if args.csv:
+        df_jobs.to_csv(args.csv, index=False)
+        print(f"Wrote {len(df_jobs)} job(s) to {args.csv}")
+    else:
+        with pd.option_context('display.max_rows', None, 'display.max_columns', None, 'display.width', None):
+            print(df_jobs)
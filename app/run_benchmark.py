@@ -0,0 +1,105 @@
+import argparse
+import json
+import logging
+import time
+
+import numpy as np
+
+from benchmark.mock_board import MockJobBoard
+from engine.models import SearchQuery
+from services.config_service import ConfigService
+from services.scraper_factory import ScraperFactory
+
+logger = logging.getLogger(__name__)
+
+SITES = ('linkedin', 'indeed', 'jobsdb')
+
+
+def time_page_calls(scraper, durations: list):
+    # Wraps the scraper's navigation methods on this instance so every page load or click is timed
+    for name in ('_load_page', '_click_page'):
+        original = getattr(scraper, name)
+
+        def timed(*args, _original=original, **kwargs):
+            start = time.perf_counter()
+            try:
+                return _original(*args, **kwargs)
+            finally:
+                durations.append(time.perf_counter() - start)
+
+        setattr(scraper, name, timed)
+
+
+def benchmark_site(site: str, config, board: MockJobBoard, num_jobs: int) -> dict:
+    board.reset_stats()
+    scraper = ScraperFactory(config).create_scraper(site)
+    page_times = []
+    time_page_calls(scraper, page_times)
+    query = SearchQuery(
+        job_title="Data Scientist",
+        location="Vancouver",
+        num_jobs=num_jobs,
+        fetch_description=True
+    )
+
+    start = time.perf_counter()
+    df_jobs = scraper.search([query])
+    elapsed = time.perf_counter() - start
+
+    # LinkedIn renders details in place, so the wait for the details panel is its per-job page time
+    if not getattr(scraper, 'harvest', False):
+        page_times.extend(seconds for seconds, _ in scraper.wait_stats.get('job_details', []))
+    num_scraped = 0 if df_jobs is None else len(df_jobs)
+    page_loads = sum(count for (load_site, _), count in board.page_loads.items() if load_site == site)
+    return {
+        'site': site,
+        'jobs': num_scraped,
+        'seconds': round(elapsed, 2),
+        'jobs_per_minute': round(num_scraped / elapsed * 60, 1) if elapsed else 0.0,
+        'page_loads': page_loads,
+        'page_loads_per_job': round(page_loads / num_scraped, 2) if num_scraped else None,
+        'challenges': board.challenges[site],
+        'page_time_p50': round(float(np.percentile(page_times, 50)), 3) if page_times else None,
+        'page_time_p95': round(float(np.percentile(page_times, 95)), 3) if page_times else None,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against the local mock job board")
+    parser.add_argument("--config", default="config/config.yml", help="Config whose selenium section is used for the browser")
+    parser.add_argument("--sites", nargs='+', choices=SITES, default=list(SITES))
+    parser.add_argument("--jobs", type=int, default=30, help="num_jobs of the benchmark query")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--jobs-per-page", type=int, default=10)
+    parser.add_argument("--challenge-rate", type=float, default=0.0)
+    parser.add_argument("--challenge-delay", type=float, default=1.0)
+    parser.add_argument("--linkedin-harvest", action="store_true", help="Scrape LinkedIn in harvest mode instead of clicking through the cards")
+    parser.add_argument("--output", metavar="PATH", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    config = ConfigService(config_path=args.config).get_config()
+    board = MockJobBoard(latency=args.latency, jitter=args.jitter, pages=args.pages, jobs_per_page=args.jobs_per_page,
+                         challenge_rate=args.challenge_rate, challenge_delay=args.challenge_delay).start()
+    config.linkedin_url = f"{board.base_url}/linkedin"
+    config.indeed_url = f"{board.base_url}/indeed"
+    if args.linkedin_harvest:
+        config.selenium.linkedin_harvest = True
+    config.jobsdb_url = f"{board.base_url}/jobsdb"
+
+    results = []
+    try:
+        for site in args.sites:
+            logger.info(f"Benchmarking {site}")
+            results.append(benchmark_site(site, config, board, args.jobs))
+    finally:
+        board.stop()
+
+    for result in results:
+        logger.info(f"{result['site']}: {result['jobs']} job(s) in {result['seconds']}s, {result['jobs_per_minute']} jobs/min, "
+                    f"{result['page_loads_per_job']} page load(s)/job, {result['challenges']} challenge(s), "
+                    f"page time p50 {result['page_time_p50']}s p95 {result['page_time_p95']}s")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
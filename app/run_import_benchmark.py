@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+IMPORT_TIME_PATTERN = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+# Modules the registries only import when a task needs them, `import main` must not pull them in
+LAZY_MODULES = (
+    'DrissionPage',
+    'pyarrow',
+    'langchain_core',
+    'langchain_google_genai',
+    'langchain_ollama',
+    'scrapers.linkedin_scrapper',
+    'scrapers.indeed_scrapper',
+    'scrapers.jobsdb_scrapper',
+)
+# Lazy modules this eager dependency imports by itself are not counted, pandas 3 loads pyarrow whenever it is installed
+BASELINE_MODULE = 'pandas'
+
+
+def measure_imports(module: str) -> dict:
+    # A fresh interpreter per run, as -X importtime only reports modules that are not imported yet
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                             capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{process.stderr.strip().splitlines()[-1]}")
+    # module name -> (self, cumulative) in microseconds, top-level imports have no indentation
+    modules = {}
+    total_us = 0
+    for line in process.stderr.splitlines():
+        m = IMPORT_TIME_PATTERN.match(line)
+        if m:
+            self_us, cumulative_us, indent, name = int(m.group(1)), int(m.group(2)), m.group(3), m.group(4)
+            modules[name] = (self_us, cumulative_us)
+            if not indent:
+                total_us += cumulative_us
+    return {'total_us': total_us, 'modules': modules}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the import time of an entry point, fails on budget or laziness regressions")
+    parser.add_argument("--module", default="main", help="Module to import, e.g. main or daemon")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest top-level packages to report")
+    parser.add_argument("--budget-ms", type=float, help="Fail when the median import time exceeds this")
+    parser.add_argument("--output", metavar="PATH", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    # The first run also compiles the .pyc files, so it is not measured
+    runs = [measure_imports(args.module) for _ in range(args.runs + 1)][1:]
+    median_ms = statistics.median(run['total_us'] for run in runs) / 1000
+    names = set().union(*(run['modules'] for run in runs))
+    cumulative_ms = {name: statistics.median(run['modules'][name][1] for run in runs if name in run['modules']) / 1000 for name in names}
+    top_level = sorted((name for name in names if '.' not in name and name != args.module), key=cumulative_ms.get, reverse=True)[:args.top]
+    baseline = measure_imports(BASELINE_MODULE)['modules']
+    eager = [name for name in LAZY_MODULES if name in names and name not in baseline]
+
+    print(f"import {args.module}: median {median_ms:.1f}ms over {args.runs} run(s), {len(names)} module(s)")
+    for name in top_level:
+        print(f"  {cumulative_ms[name]:8.1f}ms  {name}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump({'module': args.module, 'runs': args.runs, 'median_ms': round(median_ms, 1), 'num_modules': len(names),
+                       'top_level_ms': {name: round(cumulative_ms[name], 1) for name in top_level}, 'eager_lazy_modules': eager}, file, indent=2)
+
+    failed = False
+    if eager:
+        print(f"import {args.module} eagerly imports {', '.join(eager)}, which should only be imported when a task uses them", file=sys.stderr)
+        failed = True
+    if args.budget_ms is not None and median_ms > args.budget_ms:
+        print(f"import {args.module} took {median_ms:.1f}ms, over the {args.budget_ms:g}ms budget", file=sys.stderr)
+        failed = True
+    sys.exit(1 if failed else 0)
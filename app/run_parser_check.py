@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+import sys
+from typing import List
+
+from DrissionPage.common import make_session_ele
+
+from scrapers.abstract_scrapper import is_challenge_html
+from services.scraper_factory import SITES
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark', 'fixtures')
+
+
+def read_fixture(site: str, name: str) -> str:
+    with open(os.path.join(FIXTURE_DIR, site, name), 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+def check_site(site: str) -> List[str]:
+    # Parses the saved pages the way session mode parses an HTTP response, no browser is started
+    scraper_class = SITES.get(site)
+    scraper = scraper_class.__new__(scraper_class)
+    expected = json.loads(read_fixture(site, 'expected.json'))
+    errors = []
+
+    listing_html, detail_html = read_fixture(site, 'listing.html'), read_fixture(site, 'detail.html')
+    for name, html in (('listing', listing_html), ('detail', detail_html)):
+        if is_challenge_html(html):
+            errors.append(f"{name} page is detected as a Cloudflare challenge")
+
+    job_ids = scraper._listing_job_ids(make_session_ele(listing_html))
+    if job_ids != expected['listing_job_ids']:
+        errors.append(f"listing job ids {job_ids} != {expected['listing_job_ids']}")
+
+    company_name, job_title, location, job_description = scraper._parse_job(make_session_ele(detail_html))
+    for field, value in (('company', company_name), ('job_title', job_title), ('location', location)):
+        if (value or '').strip() != expected[field]:
+            errors.append(f"{field} {value!r} != {expected[field]!r}")
+    for text in expected['description_contains']:
+        if text not in (job_description or ''):
+            errors.append(f"description is missing {text!r}")
+    return errors
+
+
+def check_nothing_to_scrape(site: str) -> List[str]:
+    # A rerun where every listed job is already known scrapes an empty id list, with tabs and session mode on
+    scraper_class = SITES.get(site)
+    scraper = scraper_class.__new__(scraper_class)
+    scraper.driver, scraper.browser_pool, scraper.resource_blocker = None, None, None
+    scraper.num_tabs, scraper.session_mode, scraper.curr_query_finished = 3, True, False
+    try:
+        scraper._scrap_jobs([])
+    except Exception as e:
+        return [f"scraping no job ids raised {e!r}"]
+    return []
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Check the listing and detail parsers of each site against saved HTML pages")
+    parser.add_argument("--sites", nargs='+', default=sorted(os.listdir(FIXTURE_DIR)))
+    args = parser.parse_args()
+
+    failed = False
+    for site in args.sites:
+        errors = check_site(site) + check_nothing_to_scrape(site)
+        print(f"{site}: {'ok' if not errors else 'FAILED'}")
+        for error in errors:
+            print(f"  {error}", file=sys.stderr)
+        failed = failed or bool(errors)
+    sys.exit(1 if failed else 0)
@@ -1,23 +1,64 @@
 import abc
+import json
 import logging
+import os
+import shutil
+import threading
 import time
-from typing import Optional, List
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from queue import Full, Queue
+from typing import Any, Callable, Dict, Iterator, Optional, List, Iterable, Set, Union, Tuple
 
 import pandas as pd
+import requests
+from DrissionPage.common import make_session_ele
 from DrissionPage._configs.chromium_options import ChromiumOptions
 from DrissionPage._elements.chromium_element import ChromiumElement
 from DrissionPage._pages.chromium_page import ChromiumPage
+from DrissionPage._pages.chromium_tab import ChromiumTab
 
+from common.blob_store import DESCRIPTIONS
 from common.dotdict import DotDict
-from .cloudflare_bypasser import CloudflareBypasser
+from common.metrics import METRICS
+from .browser_pool import BrowserPool
+from .clearance_store import ClearanceStore
+from .cloudflare_bypasser import (ChallengeMonitor, CloudflareBypasser, DEFAULT_BACKOFF_BASE, DEFAULT_BACKOFF_MAX, DEFAULT_MAX_RETRIES,
+                                  is_challenge_title)
 from .job_attribute import JobAttr
+from .job_record import JobRecord
+from .resource_blocker import ResourceBlocker
 from engine.models import SearchQuery
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_DEBUG_PORT = 9222
+DEFAULT_WAIT_TIMEOUT = 10
+DEFAULT_MAX_PENDING_JOBS = 100
+WAIT_POLL_INTERVAL = 0.1
+# Network is considered idle once no new resource entry shows up for this long
+NETWORK_IDLE_SECONDS = 0.5
+# Profile folders that are safe to skip when cloning a profile for a worker browser
+PROFILE_COPY_IGNORE = shutil.ignore_patterns('Cache', 'Code Cache', 'GPUCache', 'Service Worker', 'Singleton*', '*.lock', 'lockfile')
+
+
+def is_challenge_html(html: str) -> bool:
+    title = make_session_ele(html).ele('tag:title', timeout=0)
+    return bool(title) and is_challenge_title(title.text)
+
+
+def prepare_worker_profile(user_data_dir: str, worker_id: int) -> str:
+    worker_dir = f"{user_data_dir.rstrip(os.sep)}-worker-{worker_id}"
+    if not os.path.exists(worker_dir) and os.path.isdir(user_data_dir):
+        logger.info(f"Cloning browser profile to {worker_dir}")
+        shutil.copytree(user_data_dir, worker_dir, ignore=PROFILE_COPY_IGNORE, dirs_exist_ok=True)
+    return worker_dir
+
 
 class AbstractScrapper(abc.ABC):
-    def __init__(self, selenium_config: DotDict):
+    site_name = None
+
+    def __init__(self, selenium_config: DotDict, worker_id: Optional[int] = None, browser_pool: Optional[BrowserPool] = None):
         if selenium_config.browser == 'chrome':
             browser_config = selenium_config.chrome
 
@@ -29,48 +70,387 @@ class AbstractScrapper(abc.ABC):
             if not browser_config.show_browser:
                 self.options.set_argument("--headless")  # Run in headless mode (no browser UI)
             if browser_config.user_data_dir:
-                self.options.set_user_data_path(browser_config.user_data_dir)
+                user_data_dir = browser_config.user_data_dir
+                if worker_id is not None:
+                    # Parallel workers need their own profile dir as Chromium locks it per process
+                    user_data_dir = prepare_worker_profile(user_data_dir, worker_id)
+                self.options.set_user_data_path(user_data_dir)
                 self.options.set_user(browser_config.profile)
+                if worker_id is not None:
+                    self.options.set_local_port(browser_config.get('debug_port', DEFAULT_DEBUG_PORT) + worker_id + 1)
+            elif worker_id is not None:
+                self.options.auto_port()
             if 'binary_path' in browser_config:
                 self.options.set_browser_path(browser_config.binary_path)
+            self.resource_blocker = ResourceBlocker.from_config(browser_config.get('resource_blocking'), self.site_name)
         else:
             raise ValueError(f"Unsupported browser: {selenium_config.browser}")
 
         self.cf_bypasser: Optional[CloudflareBypasser] = None
+        self.cloudflare_config = selenium_config.get('cloudflare') or {}
+        self.clearance_store = ClearanceStore.from_config(self.cloudflare_config)
+        self.challenge_monitor = ChallengeMonitor.from_config(self.cloudflare_config)
 
         self.browser = selenium_config.browser
+        self.worker_id = worker_id
+        self.browser_pool = browser_pool
+        self.num_tabs = max(1, selenium_config.get('num_tabs', 1))
+        self.session_mode = selenium_config.get('session_mode', False)
+        self.session_workers = max(1, selenium_config.get('session_workers', 8))
+        self.wait_timeout = selenium_config.get('wait_timeout', DEFAULT_WAIT_TIMEOUT)
+        # Fixed pause between detail pages, kept apart from the condition waits so it only throttles on purpose
+        self.politeness_delay = selenium_config.get('politeness_delay', 0)
+        # Pagination stops after this many already seen jobs in a row, 0 pages until num_jobs or the last page
+        self.stop_after_seen = selenium_config.get('stop_after_seen', 0)
+        # Set by the caller from the previous run (query key -> job ids), the listed ids are filled during the search in
+        # listing order and only become the next watermark for the ones that end up in the history
+        self.watermarks: Dict[str, List[str]] = {}
+        self.listed_job_ids: Dict[str, Dict[str, None]] = {}
+        self.curr_query_key: Optional[str] = None
+        self.curr_watermark: Set[str] = set()
+        self.curr_listed: Set[str] = set()
+        self.consecutive_seen = 0
+        self.reached_watermark = False
+        self.wait_stats = defaultdict(list)  # wait name -> [(seconds, condition met)]
+        self._wait_lock = threading.Lock()
+        self._job_lock = threading.Lock()
+        # Set by iter_jobs when its consumer stops early, the search ends after the current query
+        self._search_cancelled = threading.Event()
         self.driver: Optional[ChromiumPage] = None
         self.curr_query: Optional[SearchQuery] = None
-        self.scrapped_job_list = []
+        self.scrapped_job_list: List[JobRecord] = []
+        # Called with every accepted job record and with every query that ran to the end
+        self.job_listeners: List[Callable[[JobRecord], None]] = []
+        self.query_listeners: List[Callable[[SearchQuery], None]] = []
+        self.history: Set[str] = set()
+        self.skipped_known_counter = 0
         self.job_counter = 0
         self.page_counter = 0
         self.curr_query_finished = False
 
+    def _is_known_job(self, job_id: str) -> bool:
+        if job_id in self.history:
+            self.skipped_known_counter += 1
+            return True
+        return False
+
+    @classmethod
+    @abc.abstractmethod
+    def from_config(cls, config: DotDict, worker_id: Optional[int] = None, browser_pool: Optional[BrowserPool] = None) -> 'AbstractScrapper':
+        # Builds the scraper from the whole config.yml, used by ScraperFactory for built-in and plugged-in sites
+        pass
+
     def reset(self):
         self.job_counter = 0
         self.page_counter = 0
         self.curr_query_finished = False
+        self.curr_listed = set()
+        self.consecutive_seen = 0
+        self.reached_watermark = False
 
-    def _load_page(self, url):
-        self.driver.get(url)
-        self.driver._wait_loaded(5)
+    def _query_key(self) -> str:
+        # Everything that shapes the result pages, num_jobs and the word/company filters applied after fetching are left out
+        query = self.curr_query
+        return json.dumps([
+            query.job_title, query.location, query.custom_url, query.job_type, query.experience_level, query.workspace,
+            query.hours_within, query.salary_lower_bound
+        ], default=lambda value: value.value)
 
-        if self.is_cloudflare_block():
-            self.cf_bypasser.bypass()
+    def _is_new_listing(self, job_id: Optional[str]) -> bool:
+        # A job shown again on a later page of the same query goes through _mark_listed and _is_known_job once only,
+        # counting it twice would stop pagination at the watermark too early
+        if not job_id or job_id in self.curr_listed:
+            return False
+        self.curr_listed.add(job_id)
+        return True
+
+    def _mark_listed(self, job_id: str) -> bool:
+        # Called with every job id in listing order, returns True once pagination can stop at the watermark
+        self.listed_job_ids.setdefault(self.curr_query_key, {}).setdefault(job_id)
+        if self.stop_after_seen <= 0:
+            return False
+
+        if job_id in self.curr_watermark or job_id in self.history:
+            self.consecutive_seen += 1
+        else:
+            self.consecutive_seen = 0
+        if self.consecutive_seen >= self.stop_after_seen and not self.reached_watermark:
+            logger.info(f"{self.consecutive_seen} already seen job(s) in a row, the rest of the results is older than the last run")
+            METRICS.inc('watermark_stops_total', site=self.site_name)
+            self.reached_watermark = True
+        return self.reached_watermark
+
+    def _add_job(self, job: JobRecord) -> bool:
+        with self._job_lock:
+            if self.job_counter >= self.curr_query.num_jobs:
+                return False
+            self.job_counter += 1
+            self.scrapped_job_list.append(job)
+            if self.job_counter >= self.curr_query.num_jobs:
+                logger.info(f"Stop searching as current job count already reach {self.curr_query.num_jobs}")
+                self.curr_query_finished = True
+        # Outside the lock as a full stream queue blocks until the consumer catches up
+        for listener in self.job_listeners:
+            listener(job)
+        return True
+
+    def _is_excluded_job(self, company_name: str, job_title: str) -> bool:
+        if self.curr_query.exclude_companies and company_name in self.curr_query.exclude_companies:
+            logger.info(f"Skip this job as {company_name} in the list of excluded companies")
+            return True
+
+        if self.curr_query.include_words and not any(kw.lower() in job_title.lower() for kw in self.curr_query.include_words):
+            logger.info(f"Skip this job as {job_title} does not include the required key words in {self.curr_query.include_words}")
+            return True
+
+        if self.curr_query.exclude_words and any(kw.lower() in job_title.lower() for kw in self.curr_query.exclude_words):
+            logger.info(f"Skip this job as {job_title} include keywords in the exclusive word list {self.curr_query.exclude_words}")
+            return True
+
+        return False
+
+    def _wait_for(self, name: str, condition: Callable[[], Any], timeout: Optional[float] = None) -> bool:
+        # Polls the condition until it is truthy or the timeout passes, recording how long the wait took
+        timeout = self.wait_timeout if timeout is None else timeout
+        start = time.perf_counter()
+        deadline = start + timeout
+        met = False
+        while True:
+            try:
+                met = bool(condition())
+            except Exception as e:
+                logger.debug(f"Wait condition {name} raised: {e}")
+            if met or time.perf_counter() >= deadline:
+                break
+            time.sleep(WAIT_POLL_INTERVAL)
+
+        elapsed = time.perf_counter() - start
+        with self._wait_lock:
+            self.wait_stats[name].append((elapsed, met))
+        METRICS.observe('wait_seconds', elapsed, site=self.site_name, wait=name)
+        if not met:
+            METRICS.inc('wait_timeouts_total', site=self.site_name, wait=name)
+            logger.debug(f"Wait {name} timed out after {elapsed:.2f}s")
+        return met
+
+    def _wait_for_count(self, name: str, count: Callable[[], int], at_least: int, timeout: Optional[float] = None) -> bool:
+        return self._wait_for(name, lambda: count() >= at_least, timeout)
+
+    def _wait_network_idle(self, name: str, page: Optional[Union[ChromiumPage, ChromiumTab]] = None, timeout: Optional[float] = None) -> bool:
+        page = page or self.driver
+        state = {'count': -1, 'since': time.perf_counter()}
+
+        def is_idle() -> bool:
+            count = page.run_js("return performance.getEntriesByType('resource').length;")
+            now = time.perf_counter()
+            if count != state['count']:
+                state['count'], state['since'] = count, now
+                return False
+            return now - state['since'] >= NETWORK_IDLE_SECONDS
+
+        return self._wait_for(name, is_idle, timeout)
+
+    def _polite_pause(self):
+        if self.politeness_delay > 0:
+            time.sleep(self.politeness_delay)
+
+    def _log_wait_stats(self):
+        for name, records in self.wait_stats.items():
+            durations = [elapsed for elapsed, _ in records]
+            timeouts = sum(1 for _, met in records if not met)
+            logger.info(f"Wait {name} on {self.site_name}: {len(durations)} wait(s), avg {sum(durations) / len(durations):.2f}s, "
+                        f"max {max(durations):.2f}s, {timeouts} timeout(s)")
+
+    def _make_cf_bypasser(self, page: Union[ChromiumPage, ChromiumTab]) -> CloudflareBypasser:
+        return CloudflareBypasser(
+            page,
+            max_retries=self.cloudflare_config.get('max_retries', DEFAULT_MAX_RETRIES),
+            site_name=self.site_name,
+            clearance_store=self.clearance_store,
+            backoff_base=self.cloudflare_config.get('backoff_base', DEFAULT_BACKOFF_BASE),
+            backoff_max=self.cloudflare_config.get('backoff_max', DEFAULT_BACKOFF_MAX)
+        )
+
+    def _throttle(self):
+        # Backs off while a growing share of page loads hits a challenge, before the site starts hard-blocking
+        delay = self.challenge_monitor.delay()
+        if delay > 0:
+            logger.info(f"Challenge rate on {self.site_name} at {self.challenge_monitor.rate:.0%}, slowing down by {delay:.1f}s")
+            METRICS.inc('challenge_slowdown_seconds_total', delay, site=self.site_name)
+            time.sleep(delay)
+
+    def _load_page(self, url, page: Optional[Union[ChromiumPage, ChromiumTab]] = None):
+        page = page or self.driver
+        self._throttle()
+        with METRICS.timer('page_load_seconds', site=self.site_name, action='load'):
+            page.get(url)
+            page._wait_loaded(5)
+        METRICS.inc('page_loads_total', site=self.site_name, action='load')
+
+        challenged = self.is_cloudflare_block(page)
+        self.challenge_monitor.record(challenged)
+        if challenged:
+            if page is self.driver:
+                self.cf_bypasser.bypass()
+            else:
+                self._make_cf_bypasser(page).bypass()
+
+    def _detail_url(self, job_id: str) -> str:
+        raise NotImplementedError
+
+    def _listing_job_ids(self, page) -> List[str]:
+        # Job ids of a results page in listed order, from a browser page or a parsed HTML element
+        raise NotImplementedError
+
+    def _parse_job(self, page) -> Tuple[str, str, str, str]:
+        # Returns (company_name, job_title, location, job_description) from a browser page or a parsed HTML element
+        raise NotImplementedError
+
+    def _save_job(self, job_id: str, company_name: str, job_title: str, location: str, job_description: str):
+        logger.info(f"Company: {company_name}, Job Title: {job_title}")
+
+        if self._is_excluded_job(company_name, job_title):
+            return
+
+        # The description goes to the blob store once, the record only keeps its hash
+        self._add_job(JobRecord(
+            job_id=job_id,
+            search_title=self.curr_query.job_title,
+            company=company_name,
+            job_title=job_title,
+            location=location,
+            job_url=self._detail_url(job_id),
+            desc_hash=DESCRIPTIONS.put(job_description if self.curr_query.fetch_description else "")
+        ))
+
+    def _scrap_job(self, job_id: str, page: Optional[Union[ChromiumPage, ChromiumTab]] = None):
+        page = page or self.driver
+        self._load_page(self._detail_url(job_id), page)
+        self._save_job(job_id, *self._parse_job(page))
+
+    def _build_http_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=self.session_workers, pool_maxsize=self.session_workers)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'User-Agent': self.driver.user_agent,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9',
+        })
+        for cookie in self.driver.cookies(all_domains=True, all_info=True):
+            session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'), path=cookie.get('path', '/'))
+        return session
+
+    def _scrap_job_via_session(self, session: requests.Session, job_id: str) -> bool:
+        self._throttle()
+        with METRICS.timer('page_load_seconds', site=self.site_name, action='http'):
+            response = session.get(self._detail_url(job_id), timeout=15)
+        METRICS.inc('page_loads_total', site=self.site_name, action='http')
+        challenged = is_challenge_html(response.text)
+        self.challenge_monitor.record(challenged)
+        if response.status_code != 200 or challenged:
+            return False
+        self._save_job(job_id, *self._parse_job(make_session_ele(response.text)))
+        return True
+
+    def _scrap_jobs_via_session(self, job_ids: List[str]) -> List[str]:
+        session = self._build_http_session()
+
+        def scrap(job_id: str) -> Optional[str]:
+            if self.curr_query_finished:
+                return None
+            try:
+                return None if self._scrap_job_via_session(session, job_id) else job_id
+            except Exception as e:
+                logger.error(e)
+                return job_id
+
+        logger.info(f"Scraping {len(job_ids)} job(s) over HTTP with {self.session_workers} worker(s)")
+        with ThreadPoolExecutor(max_workers=self.session_workers) as pool:
+            fallback_ids = [job_id for job_id in pool.map(scrap, job_ids) if job_id is not None]
+        session.close()
+        if fallback_ids:
+            logger.info(f"{len(fallback_ids)} job(s) hit a challenge page or failed over HTTP, falling back to the browser")
+        return fallback_ids
+
+    def _scrap_jobs(self, job_ids: List[str]):
+        if self.session_mode and job_ids:
+            job_ids = self._scrap_jobs_via_session(job_ids)
+        # Nothing left when every listed job is known or was fetched over HTTP, and no tab pool can have 0 workers
+        if not job_ids:
+            return
+
+        if self.num_tabs == 1:
+            for job_id in job_ids:
+                try:
+                    self._scrap_job(job_id)
+                except Exception as e:
+                    logger.error(e)
+                if self.curr_query_finished:
+                    break
+                self._polite_pause()
+            return
+
+        opened_tabs = self._open_tabs(min(self.num_tabs, len(job_ids)))
+        tabs = Queue()
+        for tab in opened_tabs:
+            tabs.put(tab)
+
+        def scrap_in_tab(job_id: str):
+            if self.curr_query_finished:
+                return
+            tab = tabs.get()
+            try:
+                self._scrap_job(job_id, tab)
+            except Exception as e:
+                logger.error(e)
+            finally:
+                self._polite_pause()
+                tabs.put(tab)
+
+        logger.info(f"Scraping {len(job_ids)} job(s) with {tabs.qsize()} tab(s)")
+        with ThreadPoolExecutor(max_workers=tabs.qsize()) as pool:
+            list(pool.map(scrap_in_tab, job_ids))
+
+        self._close_tabs(opened_tabs)
+
+    def _open_tabs(self, count: int) -> List[ChromiumTab]:
+        if self.browser_pool is not None:
+            tabs = self.browser_pool.acquire_tabs(self.driver, count)
+        else:
+            tabs = [self.driver.new_tab() for _ in range(count)]
+        if self.resource_blocker is not None:
+            for tab in tabs:
+                self.resource_blocker.attach(tab)
+        return tabs
+
+    def _close_tabs(self, tabs: List[ChromiumTab]):
+        if self.browser_pool is not None:
+            self.browser_pool.release_tabs(self.driver, tabs)
+            return
+        for tab in tabs:
+            tab.close()
 
     def _click_page(self, ele: ChromiumElement):
-        ele.click()
-        self.driver._wait_loaded(5)
+        self._throttle()
+        with METRICS.timer('page_load_seconds', site=self.site_name, action='click'):
+            ele.click()
+            self.driver._wait_loaded(5)
+        METRICS.inc('page_loads_total', site=self.site_name, action='click')
 
-        if self.is_cloudflare_block():
+        challenged = self.is_cloudflare_block()
+        self.challenge_monitor.record(challenged)
+        if challenged:
             self.cf_bypasser.bypass()
 
-    def _page_scroll(self, web_element: ChromiumElement):
+    def _page_scroll(self, web_element: ChromiumElement, is_rendered: Optional[Callable[[], bool]] = None, step_timeout: float = 1):
+        # Each step waits for the network to settle instead of a fixed second, and stops once is_rendered() holds
         self.driver.run_js("arguments[0].scrollTop = arguments[0].scrollHeight", web_element)
-        time.sleep(1)
-        while True:
+        self._wait_network_idle('scroll', timeout=step_timeout)
+        while not (is_rendered and is_rendered()):
             self.driver.run_js("arguments[0].scrollTop -= 500;", web_element)
-            time.sleep(1)
+            self._wait_network_idle('scroll', timeout=step_timeout)
             scroll_top = self.driver.run_js("return arguments[0].scrollTop", web_element)
             if scroll_top <= 0:
                 break
@@ -78,40 +458,112 @@ class AbstractScrapper(abc.ABC):
     def _build_url(self) -> str:
         raise NotImplementedError
 
-    def _scrap_job(self, job_id: str):
-        raise NotImplementedError
-
     def _scrap_page(self):
         raise NotImplementedError
 
     def _search_query(self):
         raise NotImplementedError
 
-    def search(self, queries: List[SearchQuery]) -> pd.DataFrame:
+    def search(self, queries: List[SearchQuery], history: Optional[Iterable[str]] = None) -> pd.DataFrame:
         self.scrapped_job_list = []
+        self.history = set(history or ())
+        self.skipped_known_counter = 0
+        self.listed_job_ids = {}
+        self.wait_stats.clear()
 
         if self.browser == 'chrome':
-            self.driver = ChromiumPage(addr_or_opts=self.options)
+            start = time.perf_counter()
+            if self.browser_pool is not None:
+                self.driver = self.browser_pool.acquire(self.options)
+            else:
+                self.driver = ChromiumPage(addr_or_opts=self.options)
+                logger.info(f"Browser ready in {time.perf_counter() - start:.2f}s (cold start)")
+            if self.resource_blocker is not None:
+                self.resource_blocker.reset_stats()
+                self.resource_blocker.attach(self.driver)
+            if self.clearance_store is not None:
+                self.clearance_store.restore(self.driver)
 
-        self.cf_bypasser = CloudflareBypasser(self.driver)
+        self.cf_bypasser = self._make_cf_bypasser(self.driver)
 
-        for query in queries:
-            logger.info(f"Starting searching {query.job_title}")
-            self.reset()
-            self.curr_query = query
-            self._search_query()
+        try:
+            for query in queries:
+                if self._search_cancelled.is_set():
+                    logger.info("Search cancelled, skipping the remaining queries")
+                    break
+                logger.info(f"Starting searching {query.job_title}")
+                self.reset()
+                self.curr_query = query
+                self.curr_query_key = self._query_key()
+                self.curr_watermark = set(self.watermarks.get(self.curr_query_key, ()))
+                self._search_query()
+                for listener in self.query_listeners:
+                    listener(query)
+        finally:
+            if self.clearance_store is not None:
+                # Cloudflare refreshes its cookies while browsing, keep the latest ones for the next run
+                try:
+                    self.clearance_store.save(self.driver)
+                except Exception as e:
+                    logger.error(f"Failed to save Cloudflare clearance: {e}")
+            if self.browser_pool is not None:
+                self.browser_pool.release(self.driver)
+            else:
+                self.driver.quit()
 
-        logger.info(f"Scrapped jobs count: {len(self.scrapped_job_list)}")
+        self._log_wait_stats()
+        if self.resource_blocker is not None:
+            self.resource_blocker.log_stats(self.site_name)
+        if self.challenge_monitor.loads:
+            logger.info(f"Challenge rate on {self.site_name} over the last {len(self.challenge_monitor.loads)} page load(s): {self.challenge_monitor.rate:.0%}")
+        logger.info(f"Scrapped jobs count: {len(self.scrapped_job_list)}, skipped {self.skipped_known_counter} job(s) already in history")
         df_jobs = None
         if self.scrapped_job_list:
-            df_jobs = pd.DataFrame(self.scrapped_job_list)
+            df_jobs = JobRecord.to_frame(self.scrapped_job_list)
             df_jobs = df_jobs.drop_duplicates(subset=[JobAttr.JOB_ID])
             logger.info(f"Filter out duplicated jobs. Final scrapped jobs count: {df_jobs.shape[0]}")
 
-        self.driver.quit()
-
         return df_jobs
 
-    def is_cloudflare_block(self):
-        title = self.driver.title.lower()
-        return "just a moment" in title or '請稍候...' in title
+    def iter_jobs(self, queries: List[SearchQuery], history: Optional[Iterable[str]] = None, max_pending: int = DEFAULT_MAX_PENDING_JOBS) -> Iterator[JobRecord]:
+        # Runs search() in a background thread and yields job records as soon as they are scraped
+        jobs = Queue(maxsize=max_pending)
+        done = object()
+        errors = []
+        self._search_cancelled.clear()
+
+        def put(item):
+            # A consumer that stopped early never drains the queue, the item is dropped instead of blocking the thread
+            # and its browser forever, and the current query ends
+            while not self._search_cancelled.is_set():
+                try:
+                    jobs.put(item, timeout=WAIT_POLL_INTERVAL)
+                    return
+                except Full:
+                    continue
+            self.curr_query_finished = True
+
+        def run():
+            self.job_listeners.append(put)
+            try:
+                self.search(queries, history)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                self.job_listeners.remove(put)
+                put(done)
+
+        thread = threading.Thread(target=run, name=f"{self.site_name}-scraper", daemon=True)
+        thread.start()
+        try:
+            while (job := jobs.get()) is not done:
+                yield job
+        finally:
+            # Also reached when the consumer closes the generator after a failure
+            self._search_cancelled.set()
+        thread.join()
+        if errors:
+            raise errors[0]
+
+    def is_cloudflare_block(self, page: Optional[Union[ChromiumPage, ChromiumTab]] = None):
+        return is_challenge_title((page or self.driver).title)
@@ -0,0 +1,105 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from DrissionPage._configs.chromium_options import ChromiumOptions
+from DrissionPage._pages.chromium_page import ChromiumPage
+from DrissionPage._pages.chromium_tab import ChromiumTab
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserPool:
+    """Keeps Chromium instances (and their spare tabs) warm between tasks."""
+
+    def __init__(self, max_spare_tabs: int = 8):
+        self.max_spare_tabs = max_spare_tabs
+        self._browsers: Dict[Tuple[str, str], ChromiumPage] = {}
+        self._in_use = set()
+        self._spare_tabs: Dict[int, List[ChromiumTab]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(options: ChromiumOptions) -> Tuple[str, str]:
+        return options.address, str(options.user_data_path)
+
+    @staticmethod
+    def is_healthy(page: ChromiumPage) -> bool:
+        try:
+            return page.run_js('return 1;') == 1
+        except Exception as e:
+            logger.warning(f"Browser health check failed: {e}")
+            return False
+
+    def acquire(self, options: ChromiumOptions) -> ChromiumPage:
+        start = time.perf_counter()
+        key = self._key(options)
+        with self._lock:
+            page = self._browsers.get(key)
+            if page is not None and id(page) in self._in_use:
+                raise RuntimeError(f"Browser {key} is already used by another scraper")
+
+        if page is not None and not self.is_healthy(page):
+            logger.info("Relaunching unhealthy browser")
+            self._discard(key, page)
+            page = None
+
+        warm = page is not None
+        if page is None:
+            page = ChromiumPage(addr_or_opts=options)
+
+        with self._lock:
+            self._browsers[key] = page
+            self._in_use.add(id(page))
+        logger.info(f"Browser ready in {time.perf_counter() - start:.2f}s ({'warm' if warm else 'cold start'})")
+        return page
+
+    def acquire_tabs(self, page: ChromiumPage, count: int) -> List[ChromiumTab]:
+        with self._lock:
+            spare = self._spare_tabs.setdefault(id(page), [])
+            tabs = [spare.pop() for _ in range(min(count, len(spare)))]
+        tabs.extend(page.new_tab() for _ in range(count - len(tabs)))
+        return tabs
+
+    def release_tabs(self, page: ChromiumPage, tabs: List[ChromiumTab]):
+        for tab in tabs:
+            with self._lock:
+                spare = self._spare_tabs.setdefault(id(page), [])
+                keep = len(spare) < self.max_spare_tabs
+            try:
+                if keep:
+                    tab.get('about:blank')
+                    with self._lock:
+                        spare.append(tab)
+                else:
+                    tab.close()
+            except Exception as e:
+                logger.warning(f"Failed to release tab: {e}")
+
+    def release(self, page: ChromiumPage):
+        # Reset page state between tasks but keep cookies so logins and Cloudflare clearance survive
+        try:
+            with self._lock:
+                spare_ids = [tab.tab_id for tab in self._spare_tabs.get(id(page), [])]
+            page.close_tabs([page.tab_id] + spare_ids, others=True)
+            page.clear_cache(session_storage=True, local_storage=False, cache=False, cookies=False)
+            page.get('about:blank')
+        except Exception as e:
+            logger.warning(f"Failed to reset browser, it will be relaunched on next use: {e}")
+        with self._lock:
+            self._in_use.discard(id(page))
+
+    def _discard(self, key, page: ChromiumPage):
+        with self._lock:
+            self._browsers.pop(key, None)
+            self._in_use.discard(id(page))
+            self._spare_tabs.pop(id(page), None)
+        try:
+            page.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        for key, page in list(self._browsers.items()):
+            self._discard(key, page)
@@ -0,0 +1,91 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Union
+
+from DrissionPage._pages.chromium_page import ChromiumPage
+from DrissionPage._pages.chromium_tab import ChromiumTab
+
+logger = logging.getLogger(__name__)
+
+# Cookies Cloudflare issues once a challenge is passed, cf_clearance is the one that skips the challenge
+CLEARANCE_COOKIES = ('cf_clearance', '__cf_bm', '_cfuvid')
+
+
+def _expiry(cookie: dict) -> Optional[float]:
+    # CDP reports session cookies with an expiry of -1
+    expires = cookie.get('expires')
+    return float(expires) if expires and float(expires) > 0 else None
+
+
+class ClearanceStore:
+    """SQLite store of Cloudflare clearance cookies per domain and of the Turnstile button path per site, kept across runs."""
+
+    def __init__(self, store_dir='cloudflare_clearance', db_name='clearance.db'):
+        self.db_path = os.path.join(store_dir, db_name)
+        os.makedirs(store_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        # Worker processes of a parallel run share the store
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA busy_timeout=30000")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS cookies ("
+            "domain TEXT NOT NULL, name TEXT NOT NULL, value TEXT NOT NULL, path TEXT NOT NULL, expires REAL, "
+            "user_agent TEXT NOT NULL, saved_at REAL NOT NULL, PRIMARY KEY (domain, name))"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS button_paths (site TEXT PRIMARY KEY, path TEXT NOT NULL, saved_at REAL NOT NULL)")
+        self.conn.commit()
+
+    @classmethod
+    def from_config(cls, cloudflare_config) -> Optional['ClearanceStore']:
+        if not cloudflare_config or not cloudflare_config.get('persist_clearance', False):
+            return None
+        return cls(store_dir=cloudflare_config.get('clearance_dir', 'cloudflare_clearance'))
+
+    def save(self, page: Union[ChromiumPage, ChromiumTab]) -> int:
+        # cf_clearance is bound to the user agent that solved the challenge, so it is stored with it
+        user_agent = page.user_agent
+        now = time.time()
+        rows = [
+            (cookie['domain'].lstrip('.'), cookie['name'], cookie['value'], cookie.get('path', '/'), _expiry(cookie), user_agent, now)
+            for cookie in page.cookies(all_domains=True, all_info=True)
+            if cookie['name'] in CLEARANCE_COOKIES and cookie.get('domain')
+        ]
+        if rows:
+            with self._lock:
+                with self.conn:
+                    self.conn.executemany("INSERT OR REPLACE INTO cookies VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def restore(self, page: Union[ChromiumPage, ChromiumTab]) -> int:
+        # Session cookies (no expiry) are only trusted for a day, Cloudflare rotates them long before that
+        now = time.time()
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT domain, name, value, path FROM cookies "
+                "WHERE user_agent = ? AND ((expires IS NOT NULL AND expires > ?) OR (expires IS NULL AND saved_at > ?))",
+                (page.user_agent, now, now - 86400)
+            ).fetchall()
+        if not rows:
+            return 0
+        page.set.cookies([{'domain': f".{domain}", 'name': name, 'value': value, 'path': path} for domain, name, value, path in rows])
+        logger.info(f"Restored {len(rows)} Cloudflare clearance cookie(s) for {len({row[0] for row in rows})} domain(s)")
+        return len(rows)
+
+    def button_path(self, site_name: str) -> Optional[List[int]]:
+        with self._lock:
+            row = self.conn.execute("SELECT path FROM button_paths WHERE site = ?", (site_name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_button_path(self, site_name: str, path: List[int]):
+        with self._lock:
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO button_paths VALUES (?, ?, ?)", (site_name, json.dumps(path), time.time()))
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
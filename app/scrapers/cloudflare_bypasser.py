@@ -1,23 +1,90 @@
 import logging
+import random
+import threading
 import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
 
 from DrissionPage import ChromiumPage
 
+from common.metrics import METRICS
+from .clearance_store import ClearanceStore
+
 logger = logging.getLogger(__name__)
 
+CHALLENGE_TITLES = ("just a moment", '請稍候...')
+DEFAULT_MAX_RETRIES = 6
+DEFAULT_BACKOFF_BASE = 1
+DEFAULT_BACKOFF_MAX = 16
+BYPASS_POLL_INTERVAL = 0.5
+
+
+def is_challenge_title(title: str) -> bool:
+    title = (title or '').lower()
+    return any(challenge_title in title for challenge_title in CHALLENGE_TITLES)
+
+
+class ChallengeMonitor:
+    """Rolling share of page loads that hit a challenge, used to slow a scraper down before it gets hard-blocked."""
+
+    def __init__(self, window: int = 20, threshold: float = 0.2, max_delay: float = 30, min_loads: int = 5):
+        self.loads = deque(maxlen=window)
+        self.threshold = threshold
+        self.max_delay = max_delay
+        self.min_loads = min(min_loads, window)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cloudflare_config) -> 'ChallengeMonitor':
+        cloudflare_config = cloudflare_config or {}
+        return cls(
+            window=cloudflare_config.get('challenge_window', 20),
+            threshold=cloudflare_config.get('challenge_rate_threshold', 0.2),
+            max_delay=cloudflare_config.get('max_slowdown', 30)
+        )
+
+    def record(self, challenged: bool):
+        with self._lock:
+            self.loads.append(challenged)
+
+    @property
+    def rate(self) -> float:
+        with self._lock:
+            return sum(self.loads) / len(self.loads) if self.loads else 0.0
+
+    def delay(self) -> float:
+        # No delay below the threshold, then growing linearly up to max_delay when every recent load was challenged
+        with self._lock:
+            if len(self.loads) < self.min_loads:
+                return 0.0
+        rate = self.rate
+        if rate <= self.threshold:
+            return 0.0
+        return self.max_delay * (rate - self.threshold) / max(1 - self.threshold, 1e-9)
+
 
 class CloudflareBypasser:
-    def __init__(self, driver: ChromiumPage, max_retries=-1):
+    # site -> child indexes from <body> to the element hosting the Turnstile iframe, shared by the bypassers of a process
+    _button_paths: Dict[str, List[int]] = {}
+
+    def __init__(self, driver: ChromiumPage, max_retries=DEFAULT_MAX_RETRIES, site_name: Optional[str] = None,
+                 clearance_store: Optional[ClearanceStore] = None, backoff_base: float = DEFAULT_BACKOFF_BASE,
+                 backoff_max: float = DEFAULT_BACKOFF_MAX):
         self.driver = driver
         self.max_retries = max_retries
+        self.site_name = site_name
+        self.clearance_store = clearance_store
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
 
-    def search_recursively_shadow_root_with_iframe(self, ele):
+    def search_recursively_shadow_root_with_iframe(self, ele, path: Tuple[int, ...] = ()):
+        # Returns the iframe together with the child indexes that lead to its host element
         if ele.shadow_root:
             if ele.shadow_root.child().tag == "iframe":
-                return ele.shadow_root.child()
+                return ele.shadow_root.child(), list(path)
         else:
-            for child in ele.children():
-                result = self.search_recursively_shadow_root_with_iframe(child)
+            for index, child in enumerate(ele.children()):
+                result = self.search_recursively_shadow_root_with_iframe(child, path + (index,))
                 if result:
                     return result
         return None
@@ -33,14 +100,48 @@ class CloudflareBypasser:
                     return result
         return None
 
+    def _cached_button_path(self) -> Optional[List[int]]:
+        if self.site_name not in self._button_paths and self.clearance_store is not None:
+            path = self.clearance_store.button_path(self.site_name)
+            if path is not None:
+                self._button_paths[self.site_name] = path
+        return self._button_paths.get(self.site_name)
+
+    def _remember_button_path(self, path: List[int]):
+        if self._button_paths.get(self.site_name) == path:
+            return
+        self._button_paths[self.site_name] = path
+        if self.clearance_store is not None:
+            self.clearance_store.save_button_path(self.site_name, path)
+
+    def _iframe_at(self, path: List[int]):
+        ele = self.driver.ele("tag:body")
+        for index in path:
+            children = ele.children()
+            if index >= len(children):
+                return None
+            ele = children[index]
+        if ele.shadow_root and ele.shadow_root.child().tag == "iframe":
+            return ele.shadow_root.child()
+        return None
+
     def locate_cf_button(self):
+        path = self._cached_button_path()
+        if path is not None:
+            try:
+                iframe = self._iframe_at(path)
+                if iframe:
+                    button = self.search_recursively_shadow_root_with_cf_input(iframe("tag:body"))
+                    if button:
+                        return button
+            except Exception as e:
+                logger.debug(f"Cached button path for {self.site_name} failed: {e}")
+            logger.info("Cached button path is stale. Searching for button again.")
+
         button = None
-        eles = self.driver.eles("tag:input")
-        for ele in eles:
-            if "name" in ele.attrs.keys() and "type" in ele.attrs.keys():
-                if "turnstile" in ele.attrs["name"] and ele.attrs["type"] == "hidden":
-                    button = ele.parent().shadow_root.child()("tag:body").shadow_root("tag:input")
-                    break
+        turnstile_input = self.driver.ele("css:input[type=hidden][name*=turnstile]", timeout=0)
+        if turnstile_input:
+            button = turnstile_input.parent().shadow_root.child()("tag:body").shadow_root("tag:input")
 
         if button:
             return button
@@ -48,9 +149,12 @@ class CloudflareBypasser:
             # If the button is not found, search it recursively
             logger.info("Basic search failed. Searching for button recursively.")
             ele = self.driver.ele("tag:body")
-            iframe = self.search_recursively_shadow_root_with_iframe(ele)
-            if iframe:
+            result = self.search_recursively_shadow_root_with_iframe(ele)
+            if result:
+                iframe, path = result
                 button = self.search_recursively_shadow_root_with_cf_input(iframe("tag:body"))
+                if button:
+                    self._remember_button_path(path)
             else:
                 logger.info("Iframe not found. Button search failed.")
             return button
@@ -69,18 +173,34 @@ class CloudflareBypasser:
 
     def is_bypassed(self):
         try:
-            title = self.driver.title.lower()
-            return "just a moment" not in title and '請稍候...' not in title
+            return not is_challenge_title(self.driver.title)
         except Exception as e:
             logger.error(f"Error checking page title: {e}")
             return False
 
+    def _backoff(self, try_count: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (try_count - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    def _wait_bypassed(self, timeout: float) -> bool:
+        # Polls during the backoff so a challenge that clears on its own is noticed straight away
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            if self.is_bypassed():
+                return True
+            time.sleep(BYPASS_POLL_INTERVAL)
+        return self.is_bypassed()
+
     def bypass(self):
 
         try_count = 0
+        start = time.perf_counter()
+        challenged = not self.is_bypassed()
+        if challenged:
+            METRICS.inc('cloudflare_challenges_total', site=self.site_name)
 
         while not self.is_bypassed():
-            if 0 < self.max_retries + 1 <= try_count:
+            if 0 <= self.max_retries < try_count:
                 logger.info("Exceeded maximum retries. Bypass failed.")
                 break
 
@@ -88,9 +208,15 @@ class CloudflareBypasser:
             self.click_verification_button()
 
             try_count += 1
-            time.sleep(2)
+            self._wait_bypassed(self._backoff(try_count))
 
+        if try_count:
+            METRICS.observe('cloudflare_bypass_seconds', time.perf_counter() - start, site=self.site_name)
+            METRICS.observe('cloudflare_bypass_attempts', try_count, site=self.site_name)
         if self.is_bypassed():
             logger.info("Bypass successful.")
+            if challenged and self.clearance_store is not None:
+                self.clearance_store.save(self.driver)
         else:
+            METRICS.inc('cloudflare_bypass_failures_total', site=self.site_name)
             logger.info("Bypass failed.")
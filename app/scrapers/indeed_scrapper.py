@@ -1,22 +1,30 @@
 import logging
 import math
-import time
+from typing import List, Optional
 
 from DrissionPage._elements.none_element import NoneElement
 
 from common.dotdict import DotDict
 from .abstract_scrapper import AbstractScrapper
-from .job_attribute import JobAttr
+from .browser_pool import BrowserPool
 
 logger = logging.getLogger(__name__)
 
+JOB_CARD_LINK_LOCATOR = 'css:#mosaic-provider-jobcards > ul > li a[data-jk]'
+
 
 class IndeedScraper(AbstractScrapper):
-    def __init__(self, selenium_config: DotDict, indeed_url: str):
-        super().__init__(selenium_config)
+    site_name = 'indeed'
+
+    def __init__(self, selenium_config: DotDict, indeed_url: str, worker_id: Optional[int] = None, browser_pool: Optional[BrowserPool] = None):
+        super().__init__(selenium_config, worker_id, browser_pool)
         self.indeed_url = indeed_url
         self.job_id_list = []
 
+    @classmethod
+    def from_config(cls, config: DotDict, worker_id: Optional[int] = None, browser_pool: Optional[BrowserPool] = None) -> 'IndeedScraper':
+        return cls(selenium_config=config.selenium, indeed_url=config.indeed_url, worker_id=worker_id, browser_pool=browser_pool)
+
     def reset(self):
         super().reset()
         self.job_id_list = []
@@ -30,56 +38,50 @@ class IndeedScraper(AbstractScrapper):
         if self.curr_query.hours_within is not None:
             url += f"&fromage={math.ceil(self.curr_query.hours_within / 24)}"
 
+        # Stopping at the watermark relies on the newest jobs coming first
+        if self.stop_after_seen > 0:
+            url += "&sort=date"
+
         return url
 
-    def _scrap_job(self, job_id: str):
-        job_url = f'{self.indeed_url}/viewjob?jk={job_id}'
-        self._load_page(job_url)
-        company_name = self.driver.find(['css:div[data-company-name="true"] a', 'css:div[data-company-name="true"] span'], timeout=2)[1].text
-        job_title = self.driver.ele('css:.jobsearch-JobInfoHeader-title > span').text
-        location = self.driver.ele('css:div[data-testid="inlineHeader-companyLocation"]').text
-        job_description = self.driver.ele('@id:jobDescriptionText').text
-
-        logger.info(f"Company: {company_name}, Job Title: {job_title}")
-
-        if self.curr_query.exclude_companies and company_name in self.curr_query.exclude_companies:
-            logger.info(f"Skip this job as {company_name} in the list of excluded companies")
-            return
-
-        if self.curr_query.include_words and not any(kw.lower() in job_title.lower() for kw in self.curr_query.include_words):
-            logger.info(f"Skip this job as {job_title} does not include the required key words in {self.curr_query.include_words}")
-            return
-
-        if self.curr_query.exclude_words and any(kw.lower() in job_title.lower() for kw in self.curr_query.exclude_words):
-            logger.info(f"Skip this job as {job_title} include keywords in the exclusive word list {self.curr_query.exclude_words}")
-            return
-
-        self.job_counter += 1
-        self.scrapped_job_list.append({
-            JobAttr.JOB_ID: job_id,
-            JobAttr.SEARCH_TITLE: self.curr_query.job_title,
-            JobAttr.COMPANY: company_name,
-            JobAttr.JOB_TITLE: job_title,
-            JobAttr.LOCATION: location,
-            JobAttr.JOB_URL: f"{self.indeed_url}/viewjob?jk={job_id}",
-            JobAttr.JOB_DESC: job_description if self.curr_query.fetch_description else ""
-        })
+    def _detail_url(self, job_id: str) -> str:
+        return f'{self.indeed_url}/viewjob?jk={job_id}'
+
+    def _parse_job(self, page):
+        company_name = (page.ele('css:div[data-company-name="true"] a', timeout=2) or page.ele('css:div[data-company-name="true"] span', timeout=2)).text
+        job_title = page.ele('css:.jobsearch-JobInfoHeader-title > span').text
+        location = page.ele('css:div[data-testid="inlineHeader-companyLocation"]').text
+        job_description = page.ele('@id:jobDescriptionText').text
+        return company_name, job_title, location, job_description
+
+    def _first_job_id(self):
+        first_link = self.driver.ele(JOB_CARD_LINK_LOCATOR, timeout=0)
+        return first_link.attr('data-jk') if first_link else None
+
+    def _listing_job_ids(self, page) -> List[str]:
+        return [job_link.attr('data-jk') for job_link in page.eles(JOB_CARD_LINK_LOCATOR)]
 
     def _collect_job_ids(self):
         logger.info("Start collecting job ids")
         while True:
-            job_cards = self.driver.eles('css:#mosaic-provider-jobcards > ul > li')
-            for job_card in job_cards:
-                list_a_tag = job_card.eles('css:a')
-                if list_a_tag:
-                    self.job_id_list.append(job_card.ele('css:a').attr('data-jk'))
+            for job_id in self._listing_job_ids(self.driver):
+                if not self._is_new_listing(job_id):
+                    continue
+                if self._mark_listed(job_id):
+                    break
+                if not self._is_known_job(job_id):
+                    self.job_id_list.append(job_id)
+
+            if self.reached_watermark:
+                break
 
             next_page = self.driver.ele("css:a[data-testid='pagination-page-next']")
             if next_page is None or isinstance(next_page, NoneElement):
                 break
 
+            first_job_id = self._first_job_id()
             self._click_page(next_page)
-            self.driver._wait_loaded(5)
+            self._wait_for('pagination', lambda: (job_id := self._first_job_id()) and job_id != first_job_id)
         logger.info("End collecting job ids")
 
     def _search_query(self):
@@ -87,10 +89,4 @@ class IndeedScraper(AbstractScrapper):
         logger.info(f"Search URL: {search_url}")
         self._load_page(search_url)
         self._collect_job_ids()
-        for job_id in self.job_id_list:
-            self._scrap_job(job_id)
-            time.sleep(1)
-            if self.job_counter >= self.curr_query.num_jobs:
-                logger.info(f"Stop searching as current job count already reach {self.curr_query.num_jobs}")
-                self.curr_query_finished = True
-                break
+        self._scrap_jobs(self.job_id_list)
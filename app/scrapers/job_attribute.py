@@ -8,3 +8,4 @@ class JobAttr:
     WORKSPACE = 'Workspace'
     JOB_URL = 'Job URL'
     JOB_DESC = 'Job Description'
+    DESC_HASH = 'Description Hash'
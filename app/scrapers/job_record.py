@@ -0,0 +1,37 @@
+from typing import Iterable
+
+import pandas as pd
+
+from .job_attribute import JobAttr
+
+
+class JobRecord:
+    """One scraped job. Slotted so thousands of them cost no per-job dict, the description is only referenced by its hash."""
+
+    __slots__ = ('job_id', 'search_title', 'company', 'job_title', 'location', 'job_url', 'desc_hash')
+    COLUMNS = (JobAttr.JOB_ID, JobAttr.SEARCH_TITLE, JobAttr.COMPANY, JobAttr.JOB_TITLE, JobAttr.LOCATION, JobAttr.JOB_URL, JobAttr.DESC_HASH)
+
+    def __init__(self, job_id: str, search_title: str, company: str, job_title: str, location: str, job_url: str, desc_hash: str):
+        self.job_id = job_id
+        self.search_title = search_title
+        self.company = company
+        self.job_title = job_title
+        self.location = location
+        self.job_url = job_url
+        self.desc_hash = desc_hash
+
+    def to_dict(self) -> dict:
+        return {column: getattr(self, slot) for column, slot in zip(self.COLUMNS, self.__slots__)}
+
+    @classmethod
+    def from_dict(cls, record: dict) -> 'JobRecord':
+        return cls(*(record.get(column) for column in cls.COLUMNS))
+
+    @classmethod
+    def to_frame(cls, records: Iterable['JobRecord']) -> pd.DataFrame:
+        # Built column by column, without an intermediate dict per job
+        records = list(records)
+        return pd.DataFrame({column: [getattr(record, slot) for record in records] for column, slot in zip(cls.COLUMNS, cls.__slots__)})
+
+    def __repr__(self) -> str:
+        return f"JobRecord({self.job_id!r}, {self.job_title!r} at {self.company!r})"
@@ -1,24 +1,31 @@
 import logging
 import re
-import time
+from typing import List, Optional
 
 from DrissionPage._elements.none_element import NoneElement
-from pydantic.v1.schema import encode_default
 
 from common.dotdict import DotDict
 from engine.models import JobType
 from .abstract_scrapper import AbstractScrapper
-from .job_attribute import JobAttr
+from .browser_pool import BrowserPool
 
 logger = logging.getLogger(__name__)
 
+JOB_LINK_LOCATOR = "css:div > a[data-automation='job-list-item-link-overlay']"
+
 
 class JobsDbScrapper(AbstractScrapper):
-    def __init__(self, selenium_config: DotDict, jobsdb_url: str):
-        super().__init__(selenium_config)
+    site_name = 'jobsdb'
+
+    def __init__(self, selenium_config: DotDict, jobsdb_url: str, worker_id: Optional[int] = None, browser_pool: Optional[BrowserPool] = None):
+        super().__init__(selenium_config, worker_id, browser_pool)
         self.jobsdb_url = jobsdb_url
         self.job_id_list = []
 
+    @classmethod
+    def from_config(cls, config: DotDict, worker_id: Optional[int] = None, browser_pool: Optional[BrowserPool] = None) -> 'JobsDbScrapper':
+        return cls(selenium_config=config.selenium, jobsdb_url=config.jobsdb_url, worker_id=worker_id, browser_pool=browser_pool)
+
     def reset(self):
         super().reset()
         self.job_id_list = []
@@ -38,64 +45,57 @@ class JobsDbScrapper(AbstractScrapper):
         if self.curr_query.salary_lower_bound is not None:
             param_list.append(f"?salaryrange={self.curr_query.salary_lower_bound}-")
 
+        # Stopping at the watermark relies on the newest jobs coming first
+        if self.stop_after_seen > 0:
+            param_list.append("sortmode=ListedDate")
+
         if param_list:
             url = url + '?' + '&'.join(param_list)
 
         return url
 
-    def _scrap_job(self, job_id: str):
-        job_url = f'{self.jobsdb_url}/job/{job_id}'
-        self._load_page(job_url)
+    def _detail_url(self, job_id: str) -> str:
+        return f'{self.jobsdb_url}/job/{job_id}'
 
-        company_name = self.driver.ele('css:span[data-automation="advertiser-name"]').text.strip()
-        location = self.driver.ele('css:span[data-automation="job-detail-location"]').text.strip()
-        job_title = self.driver.ele('css:h1[data-automation="job-detail-title"]').text.strip()
-        job_description = self.driver.ele('css:div[data-automation="jobAdDetails"]').text.strip()
+    def _parse_job(self, page):
+        company_name = page.ele('css:span[data-automation="advertiser-name"]').text.strip()
+        location = page.ele('css:span[data-automation="job-detail-location"]').text.strip()
+        job_title = page.ele('css:h1[data-automation="job-detail-title"]').text.strip()
+        job_description = page.ele('css:div[data-automation="jobAdDetails"]').text.strip()
+        return company_name, job_title, location, job_description
 
-        logger.info(f"Company: {company_name}, Job Title: {job_title}")
+    def _first_job_url(self):
+        first_link = self.driver.ele(JOB_LINK_LOCATOR, timeout=0)
+        return first_link.attr('href') if first_link else None
 
-        if self.curr_query.exclude_companies and company_name in self.curr_query.exclude_companies:
-            logger.info(f"Skip this job as {company_name} in the list of excluded companies")
-            return
-
-        if self.curr_query.include_words and not any(kw.lower() in job_title.lower() for kw in self.curr_query.include_words):
-            logger.info(f"Skip this job as {job_title} does not include the required key words in {self.curr_query.include_words}")
-            return
-
-        if self.curr_query.exclude_words and any(kw.lower() in job_title.lower() for kw in self.curr_query.exclude_words):
-            logger.info(f"Skip this job as {job_title} include keywords in the exclusive word list {self.curr_query.exclude_words}")
-            return
-
-        self.job_counter += 1
-        self.scrapped_job_list.append({
-            JobAttr.JOB_ID: job_id,
-            JobAttr.SEARCH_TITLE: self.curr_query.job_title,
-            JobAttr.COMPANY: company_name,
-            JobAttr.JOB_TITLE: job_title,
-            JobAttr.LOCATION: location,
-            JobAttr.JOB_URL: f"{self.jobsdb_url}/job/{job_id}",
-            JobAttr.JOB_DESC: job_description if self.curr_query.fetch_description else ""
-        })
+    def _listing_job_ids(self, page) -> List[str]:
+        job_ids = []
+        for job_link in page.eles(JOB_LINK_LOCATOR):
+            m = re.search(r"/job/(\d+)", job_link.attr('href') or '')
+            job_ids.append(m.group(1) if m else None)
+        return job_ids
 
     def _collect_job_ids(self):
         logger.info("Start collecting job ids")
         while True:
-            for job_link in self.driver.eles("css:div > a[data-automation='job-list-item-link-overlay']"):
-                job_url = job_link.attr('href')
-                m = re.search(r"/job/(\d+)", job_url)
-                job_id = m.group(1) if m else None
-                if job_id:
+            for job_id in self._listing_job_ids(self.driver):
+                if not self._is_new_listing(job_id):
+                    continue
+                if self._mark_listed(job_id):
+                    break
+                if not self._is_known_job(job_id):
                     self.job_id_list.append(job_id)
 
-            if len(self.job_id_list) >= self.curr_query.num_jobs:
+            if len(self.job_id_list) >= self.curr_query.num_jobs or self.reached_watermark:
                 break
 
             next_page = self.driver.ele("css:a[title='Next'][aria-hidden='false']", timeout=2)
             if next_page is None or isinstance(next_page, NoneElement):
                 break
 
+            first_job_url = self._first_job_url()
             self._click_page(next_page)
-            self.driver._wait_loaded(1)
+            self._wait_for('pagination', lambda: (job_url := self._first_job_url()) and job_url != first_job_url)
 
         logger.info("End collecting job ids")
 
@@ -104,15 +104,4 @@ class JobsDbScrapper(AbstractScrapper):
         logger.info(f"Search URL: {search_url}")
         self._load_page(search_url)
         self._collect_job_ids()
-        for job_id in self.job_id_list:
-            try:
-                self._scrap_job(job_id)
-            except Exception as e:
-                logger.error(e)
-                continue
-
-            time.sleep(1)
-            if self.job_counter >= self.curr_query.num_jobs:
-                logger.info(f"Stop searching as current job count already reach {self.curr_query.num_jobs}")
-                self.curr_query_finished = True
-                break
+        self._scrap_jobs(self.job_id_list)
@@ -1,19 +1,42 @@
 import logging
 import time
+from typing import List, Optional
 
 from DrissionPage._elements.none_element import NoneElement
 
 from common.dotdict import DotDict
-from .abstract_scrapper import AbstractScrapper
-from .job_attribute import JobAttr
+from .abstract_scrapper import AbstractScrapper, NETWORK_IDLE_SECONDS
+from .browser_pool import BrowserPool
 from engine.models import ExpLevel, JobType, Workspace
 
 logger = logging.getLogger(__name__)
 
+JOB_CARD_LOCATOR = 'css:li.scaffold-layout__list-item'
+JOB_DETAILS_LOCATOR = '@id:job-details'
+JOB_LIST_LOCATOR = 'css:div.scaffold-layout__list > div'
+LINKEDIN_URL = 'https://www.linkedin.com'
+# Jumps the list to its bottom so lazily appended cards get added, and reads every card's job id in the same call
+HARVEST_JS = """
+const list = arguments[0];
+if (list) { list.scrollTop = list.scrollHeight; }
+return Array.from(document.querySelectorAll('li[data-occludable-job-id]'), card => card.getAttribute('data-occludable-job-id'));
+"""
+
 
 class LinkedInScrapper(AbstractScrapper):
-    def __init__(self, selenium_config: DotDict):
-        super().__init__(selenium_config)
+    site_name = 'linkedin'
+
+    def __init__(self, selenium_config: DotDict, linkedin_url: str = LINKEDIN_URL, worker_id: Optional[int] = None,
+                 browser_pool: Optional[BrowserPool] = None):
+        super().__init__(selenium_config, worker_id, browser_pool)
+        self.linkedin_url = linkedin_url.rstrip('/')
+        # Harvest mode reads the job ids of a whole result page at once and opens each job by id,
+        # instead of scrolling the list and clicking through its cards
+        self.harvest = selenium_config.get('linkedin_harvest', False)
+        # Job details are rendered client-side, a plain HTTP fetch never sees them
+        self.session_mode = False
+        self.harvest_offset = 0
+        self.harvested_ids = set()
 
         # Dictionary to map user-friendly experience levels to LinkedIn's filter values
         self.experience_level_mapping = {
@@ -40,11 +63,16 @@ class LinkedInScrapper(AbstractScrapper):
             Workspace.HYBRID: "3"
         }
 
+    @classmethod
+    def from_config(cls, config: DotDict, worker_id: Optional[int] = None, browser_pool: Optional[BrowserPool] = None) -> 'LinkedInScrapper':
+        return cls(selenium_config=config.selenium, linkedin_url=config.get('linkedin_url', LINKEDIN_URL), worker_id=worker_id,
+                   browser_pool=browser_pool)
+
     def _build_url(self) -> str:
         if self.curr_query.custom_url:
             return self.curr_query.custom_url
 
-        base_url = "https://www.linkedin.com/jobs/search/?keywords={}&location={}"
+        base_url = self.linkedin_url + "/jobs/search/?keywords={}&location={}"
 
         job_title_formatted = self.curr_query.job_title.replace(" ", "%20")
         location_formatted = self.curr_query.location.replace(" ", "%20")
@@ -53,6 +81,10 @@ class LinkedInScrapper(AbstractScrapper):
         if self.curr_query.hours_within is not None:
             url += f"&f_TPR=r{self.curr_query.hours_within * 3600}"
 
+        # Stopping at the watermark relies on the newest jobs coming first
+        if self.stop_after_seen > 0:
+            url += "&sortBy=DD"
+
         # Add experience level filter if provided
         if self.curr_query.experience_level is not None:
             url += f"&f_E={self.experience_level_mapping[self.curr_query.experience_level]}"
@@ -67,56 +99,114 @@ class LinkedInScrapper(AbstractScrapper):
 
         return url
 
-    def _scrap_job(self, job_id: str):
-        company_name = None
-        if (company_name_dom := self.driver.find(["css:div.job-details-jobs-unified-top-card__company-name > a", "css:div.job-details-jobs-unified-top-card__company-name"], timeout=2)[1]) is not None:
-            company_name = company_name_dom.text.strip()
-        location = self.driver.eles("css:div.job-details-jobs-unified-top-card__primary-description-container > div > span")[0].text
-        job_title = self.driver.ele("css:div.job-details-jobs-unified-top-card__job-title > h1 > a").text.strip()
-        job_description = self.driver.ele("@id:job-details").text
-
-        logger.info(f"Company: {company_name}, Job Title: {job_title}")
+    def _detail_url(self, job_id: str) -> str:
+        return f"{self.linkedin_url}/jobs/view/{job_id}"
 
-        if self.curr_query.exclude_companies and company_name in self.curr_query.exclude_companies:
-            logger.info(f"Skip this job as {company_name} in the list of excluded companies")
-            return
+    def reset(self):
+        super().reset()
+        self.harvest_offset = 0
+        self.harvested_ids = set()
 
-        if self.curr_query.include_words and not any(kw.lower() in job_title.lower() for kw in self.curr_query.include_words):
-            logger.info(f"Skip this job as {job_title} does not include the required key words in {self.curr_query.include_words}")
-            return
+    def _parse_job(self, page):
+        company_name = None
+        if (company_name_dom := page.find(["css:div.job-details-jobs-unified-top-card__company-name > a", "css:div.job-details-jobs-unified-top-card__company-name"], timeout=2)[1]) is not None:
+            company_name = company_name_dom.text.strip()
+        location = page.eles("css:div.job-details-jobs-unified-top-card__primary-description-container > div > span")[0].text
+        job_title = page.ele("css:div.job-details-jobs-unified-top-card__job-title > h1 > a").text.strip()
+        job_description = page.ele(JOB_DETAILS_LOCATOR).text
+        return company_name, job_title, location, job_description
+
+    def _scrap_job(self, job_id: str, page=None):
+        page = page or self.driver
+        if self.harvest:
+            self._load_page(self._detail_url(job_id), page)
+            self._wait_for('job_details', lambda: page.ele(JOB_DETAILS_LOCATOR, timeout=0))
+        # Otherwise the job details were rendered next to the list by clicking its card
+        self._save_job(job_id, *self._parse_job(page))
+
+    def _job_details_text(self):
+        details = self.driver.ele(JOB_DETAILS_LOCATOR, timeout=0)
+        return details.text if details else None
+
+    def _listing_job_ids(self, page) -> List[str]:
+        # Same ids HARVEST_JS reads in the browser, for a results page that is already rendered or saved
+        return [job_card.attr("data-occludable-job-id") for job_card in page.eles('css:li[data-occludable-job-id]')]
+
+    def _first_job_id(self):
+        first_card = self.driver.ele(JOB_CARD_LOCATOR, timeout=0)
+        return first_card.attr("data-occludable-job-id") if first_card else None
+
+    def _cards_rendered(self, job_ul) -> bool:
+        # Cards outside the viewport are occluded and only get their link once scrolled into view
+        return len(job_ul.eles(f'{JOB_CARD_LOCATOR} a', timeout=0)) >= len(job_ul.eles(JOB_CARD_LOCATOR, timeout=0))
+
+    def _harvest_job_ids(self) -> List[str]:
+        # Done once the number of cards stops growing for a moment, rather than after a fixed number of scroll steps
+        scroll_list = self.driver.ele(JOB_LIST_LOCATOR, timeout=0) or None
+        state = {'job_ids': [], 'since': time.perf_counter()}
+
+        def settled() -> bool:
+            job_ids = self.driver.run_js(HARVEST_JS, scroll_list) or []
+            now = time.perf_counter()
+            if len(job_ids) != len(state['job_ids']):
+                state['job_ids'], state['since'] = job_ids, now
+                return False
+            return bool(job_ids) and now - state['since'] >= NETWORK_IDLE_SECONDS
+
+        self._wait_for('harvest', settled)
+        return state['job_ids']
+
+    def _page_url(self) -> str:
+        url = self._build_url()
+        if self.harvest_offset:
+            url += f"{'&' if '?' in url else '?'}start={self.harvest_offset}"
+        return url
 
-        if self.curr_query.exclude_words and any(kw.lower() in job_title.lower() for kw in self.curr_query.exclude_words):
-            logger.info(f"Skip this job as {job_title} include keywords in the exclusive word list {self.curr_query.exclude_words}")
-            return
+    def _harvest_query(self):
+        while not self.curr_query_finished:
+            logger.info(f"Harvesting page {self.page_counter + 1}")
+            self._load_page(self._page_url())
+            job_ids = [job_id for job_id in dict.fromkeys(self._harvest_job_ids()) if job_id not in self.harvested_ids]
+            has_next = bool(self.driver.ele('css:button.jobs-search-pagination__button--next', timeout=0))
+            if not job_ids:
+                break
 
-        self.job_counter += 1
-        self.scrapped_job_list.append({
-            JobAttr.JOB_ID: job_id,
-            JobAttr.SEARCH_TITLE: self.curr_query.job_title,
-            JobAttr.COMPANY: company_name,
-            JobAttr.JOB_TITLE: job_title,
-            JobAttr.LOCATION: location,
-            JobAttr.JOB_URL: f"https://www.linkedin.com/jobs/view/{job_id}",
-            # JobAttr.WORKSPACE: workspace,
-            # JobAttr.JOB_TYPE: job_type,
-            JobAttr.JOB_DESC: job_description if self.curr_query.fetch_description else ""
-        })
+            self.harvested_ids.update(job_ids)
+            self.harvest_offset += len(job_ids)
+            self.page_counter += 1
+            new_job_ids = []
+            for job_id in job_ids:
+                if not self._is_new_listing(job_id):
+                    continue
+                if self._mark_listed(job_id):
+                    break
+                if not self._is_known_job(job_id):
+                    new_job_ids.append(job_id)
+            # Detail pages navigate the browser away from the list, the next page is loaded by its offset instead
+            self._scrap_jobs(new_job_ids)
+            if not has_next or self.reached_watermark:
+                break
 
     def _scrap_page(self):
         logger.info(f"Searching page {self.page_counter + 1}")
-        scroll_list = self.driver.ele('css:div.scaffold-layout__list > div')
-        self._page_scroll(scroll_list)
+        scroll_list = self.driver.ele(JOB_LIST_LOCATOR)
         job_ul = self.driver.ele("css:#main > div > div.scaffold-layout__list-detail-inner.scaffold-layout__list-detail-inner--grow > div.scaffold-layout__list > div > ul")
-        job_cards = job_ul.eles('css:li.scaffold-layout__list-item')
+        self._page_scroll(scroll_list, is_rendered=lambda: self._cards_rendered(job_ul))
+        job_cards = job_ul.eles(JOB_CARD_LOCATOR)
         for job_card in job_cards:
+            job_id = job_card.attr("data-occludable-job-id")
+            if not self._is_new_listing(job_id):
+                continue
+            if self._mark_listed(job_id):
+                break
+            if self._is_known_job(job_id):
+                continue
+            previous_details = self._job_details_text()
             job_card.ele("tag:a").click()
-            self.driver._wait_loaded(5)
-            time.sleep(1)
-            self._scrap_job(job_card.attr("data-occludable-job-id"))
+            self._wait_for('job_details', lambda: (text := self._job_details_text()) and text != previous_details)
+            self._scrap_job(job_id)
 
-            if self.job_counter >= self.curr_query.num_jobs:
-                logger.info(f"Stop searching as current job count already reach {self.curr_query.num_jobs}")
-                self.curr_query_finished = True
+            if self.curr_query_finished:
                 break
 
         self.page_counter += 1
@@ -124,15 +214,22 @@ class LinkedInScrapper(AbstractScrapper):
     def _search_query(self):
         search_url = self._build_url()
         logger.info(f"Search URL: {search_url}")
+        if self.harvest:
+            self._harvest_query()
+            return
+
         self._load_page(search_url)
-        time.sleep(5)
+        self._wait_for_count('job_list', lambda: len(self.driver.eles(JOB_CARD_LOCATOR, timeout=0)), at_least=1)
 
         while not self.curr_query_finished:
             self._scrap_page()
+            if self.reached_watermark:
+                break
             next_button = self.driver.ele('css:button.jobs-search-pagination__button--next')
             if next_button is not None and not isinstance(next_button, NoneElement):
+                first_job_id = self._first_job_id()
                 next_button.click()
                 self.driver._wait_loaded(5)
-                time.sleep(2)
+                self._wait_for('pagination', lambda: (job_id := self._first_job_id()) and job_id != first_job_id)
             else:
                 break
@@ -1,15 +1,32 @@
 import os
+from typing import Optional
 import yaml
 from common.dotdict import DotDict
 
 class ConfigService:
     def __init__(self, config_path='config/config.yml'):
         self.config_path = config_path
+        self.mtime = self._mtime()
         self.config = self._load_config()
 
+    def _mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.config_path)
+        except OSError:
+            return None
+
     def _load_config(self) -> DotDict:
         with open(os.path.join(self.config_path), 'r') as file:
             return DotDict(yaml.safe_load(file))
 
     def get_config(self) -> DotDict:
-        return self.config
\ No newline at end of file
+        return self.config
+
+    def reload_if_changed(self) -> bool:
+        # The previous config is kept when the file is missing or fails to parse, until it changes again
+        mtime = self._mtime()
+        if mtime is None or mtime == self.mtime:
+            return False
+        self.mtime = mtime
+        self.config = self._load_config()
+        return True
@@ -1,50 +1,114 @@
+import json
+import logging
 import os
-from typing import List
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Job ids kept per query as the watermark for the next run
+MAX_WATERMARK_IDS = 200
 
 
 class JobHistoryService:
-    def __init__(self, history_dir='historical_job_ids'):
-        self.history_dir = history_dir
-        self.linkedin_history_path = os.path.join(self.history_dir, "linkedin_job_ids.txt")
-        self.indeed_history_path = os.path.join(self.history_dir, "indeed_job_ids.txt")
-        self.jobsdb_history_path = os.path.join(self.history_dir, "jobsdb_job_ids.txt")
-        self._ensure_history_files_exist()
+    LEGACY_SITES = ('linkedin', 'indeed', 'jobsdb')
 
-    def _ensure_history_files_exist(self):
+    def __init__(self, history_dir='historical_job_ids', db_name='job_history.db'):
+        self.history_dir = history_dir
+        self.db_path = os.path.join(self.history_dir, db_name)
         os.makedirs(self.history_dir, exist_ok=True)
-        if not os.path.exists(self.linkedin_history_path):
-            with open(self.linkedin_history_path, 'w', encoding='utf-8') as f:
-                pass
-        if not os.path.exists(self.indeed_history_path):
-            with open(self.indeed_history_path, 'w', encoding='utf-8') as f:
-                pass
-        if not os.path.exists(self.jobsdb_history_path):
-            with open(self.jobsdb_history_path, 'w', encoding='utf-8') as f:
-                pass
-
-    def get_linkedin_history(self) -> List[str]:
-        with open(self.linkedin_history_path, 'r', encoding='utf-8') as file:
-            return [line.strip() for line in file]
-
-    def get_indeed_history(self) -> List[str]:
-        with open(self.indeed_history_path, 'r', encoding='utf-8') as file:
-            return [line.strip() for line in file]
-
-    def get_jobsdb_history(self) -> List[str]:
-        with open(self.jobsdb_history_path, 'r', encoding='utf-8') as file:
-            return [line.strip() for line in file]
-
-    def save_linkedin_history(self, job_ids: List[str]):
-        with open(self.linkedin_history_path, 'a', encoding='utf-8') as f:
-            for job_id in job_ids:
-                f.write(job_id + '\n')
-
-    def save_indeed_history(self, job_ids: List[str]):
-        with open(self.indeed_history_path, 'a', encoding='utf-8') as f:
-            for job_id in job_ids:
-                f.write(job_id + '\n')
-
-    def save_jobsdb_history(self, job_ids: List[str]):
-        with open(self.jobsdb_history_path, 'a', encoding='utf-8') as f:
-            for job_id in job_ids:
-                f.write(job_id + '\n')
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        # WAL lets several runs read while one writes, busy_timeout makes concurrent writers wait instead of failing
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA busy_timeout=30000")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_history ("
+            "site TEXT NOT NULL, job_id TEXT NOT NULL, first_seen REAL NOT NULL, last_seen REAL NOT NULL, "
+            "PRIMARY KEY (site, job_id))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_job_history_last_seen ON job_history(last_seen)")
+        # Job ids a query listed on its last run, newest first, so the next run can stop paginating once it reaches them
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_watermarks ("
+            "site TEXT NOT NULL, query_key TEXT NOT NULL, job_ids TEXT NOT NULL, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (site, query_key))"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS imported_files (path TEXT PRIMARY KEY, imported_at REAL NOT NULL)")
+        self.conn.commit()
+        self.import_text_files()
+
+    def _legacy_path(self, site_name: str) -> str:
+        return os.path.join(self.history_dir, f"{site_name}_job_ids.txt")
+
+    def import_text_files(self):
+        for site_name in self.LEGACY_SITES:
+            path = self._legacy_path(site_name)
+            if not os.path.exists(path):
+                continue
+            with self._lock:
+                already_imported = self.conn.execute("SELECT 1 FROM imported_files WHERE path = ?", (path,)).fetchone()
+            if already_imported:
+                continue
+            with open(path, 'r', encoding='utf-8') as file:
+                job_ids = [line.strip() for line in file if line.strip()]
+            self.save_history(site_name, job_ids)
+            with self._lock:
+                self.conn.execute("INSERT INTO imported_files (path, imported_at) VALUES (?, ?)", (path, time.time()))
+                self.conn.commit()
+            logger.info(f"Imported {len(job_ids)} job id(s) from {path}")
+
+    def get_history(self, site_name: str) -> Set[str]:
+        with self._lock:
+            rows = self.conn.execute("SELECT job_id FROM job_history WHERE site = ?", (site_name,)).fetchall()
+        return {row[0] for row in rows}
+
+    def contains(self, site_name: str, job_id: str) -> bool:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT 1 FROM job_history WHERE site = ? AND job_id = ?", (site_name, job_id)
+            ).fetchone() is not None
+
+    def save_history(self, site_name: str, job_ids: Iterable[str]):
+        now = time.time()
+        rows = [(site_name, str(job_id), now, now) for job_id in job_ids]
+        if not rows:
+            return
+        with self._lock:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO job_history (site, job_id, first_seen, last_seen) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(site, job_id) DO UPDATE SET last_seen = excluded.last_seen",
+                    rows
+                )
+
+    def get_watermarks(self, site_name: str) -> Dict[str, List[str]]:
+        with self._lock:
+            rows = self.conn.execute("SELECT query_key, job_ids FROM query_watermarks WHERE site = ?", (site_name,)).fetchall()
+        return {query_key: json.loads(job_ids) for query_key, job_ids in rows}
+
+    def save_watermarks(self, site_name: str, listed_job_ids: Dict[str, Iterable[str]]):
+        # Call after saving the history of the task, listed jobs that are not in it were cut by num_jobs or failed to
+        # scrape or classify, leaving them out of the watermark lets the next run page down to them again
+        history = self.get_history(site_name)
+        watermarks = {query_key: [job_id for job_id in job_ids if job_id in history][:MAX_WATERMARK_IDS]
+                      for query_key, job_ids in listed_job_ids.items()}
+        now = time.time()
+        rows = [(site_name, query_key, json.dumps(job_ids), now) for query_key, job_ids in watermarks.items() if job_ids]
+        if not rows:
+            return
+        with self._lock:
+            with self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO query_watermarks (site, query_key, job_ids, updated_at) VALUES (?, ?, ?, ?)", rows)
+
+    def prune(self, retention_days: Optional[float]):
+        if not retention_days:
+            return
+        cutoff = time.time() - retention_days * 86400
+        with self._lock:
+            with self.conn:
+                deleted = self.conn.execute("DELETE FROM job_history WHERE last_seen < ?", (cutoff,)).rowcount
+                self.conn.execute("DELETE FROM query_watermarks WHERE updated_at < ?", (cutoff,))
+        logger.info(f"Pruned {deleted} job id(s) older than {retention_days} day(s) from history")
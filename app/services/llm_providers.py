@@ -0,0 +1,37 @@
+import os
+
+from common.registry import LazyRegistry
+
+# Context window used to size batched prompts, can be overridden by llm.num_ctx
+DEFAULT_CONTEXT_TOKENS = {
+    'gemini': 32768,
+    'ollama': 8192,
+}
+
+
+# Each provider imports its LangChain integration when it is called, so a run only pays for the provider it uses
+
+def create_ollama(config):
+    from langchain_ollama import ChatOllama
+    # keep_alive holds the model in memory between runs, e.g. '30m' or -1 for the daemon
+    return ChatOllama(model=config.llm.model, temperature=0.2, num_ctx=config.llm.get('num_ctx', DEFAULT_CONTEXT_TOKENS['ollama']),
+                      keep_alive=config.llm.get('keep_alive'))
+
+
+def create_gemini(config):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    os.environ['GOOGLE_API_KEY'] = config.llm.api_key
+    return ChatGoogleGenerativeAI(
+        model=config.llm.model,
+        temperature=0.2,
+        max_tokens=None,
+        max_retries=3
+    )
+
+
+# Third-party providers are plugged in through the `job_scraper.llm_providers` entry points,
+# as a callable taking the whole config.yml and returning a LangChain chat model
+LLM_PROVIDERS = LazyRegistry('LLM provider', group='job_scraper.llm_providers', targets={
+    'ollama': create_ollama,
+    'gemini': create_gemini,
+})
@@ -1,18 +1,111 @@
+import logging
+import random
+import re
 import time
-from langchain_core.prompts import ChatPromptTemplate
-from engine.llm_prompt import SYS_PROMPT, SKILL_JOB_TEMPLATE
+from typing import Optional, Dict, List
+
+from common.metrics import METRICS
+from common.tokens import estimate_tokens
+from engine.llm_prompt import SYS_PROMPT, SKILL_JOB_TEMPLATE, PROMPT_VERSION, BATCH_SYS_PROMPT, BATCH_JOB_TEMPLATE
+from services.rate_limiter import RateLimiter
+from services.verdict_cache import VerdictCache
+
+logger = logging.getLogger(__name__)
+
+
+def is_rate_limit_error(e: Exception) -> bool:
+    if getattr(e, 'status_code', None) == 429 or getattr(e, 'code', None) == 429:
+        return True
+    message = str(e).lower()
+    return '429' in message or 'resource exhausted' in message or 'resourceexhausted' in message or 'rate limit' in message
+
+
+VALID_VERDICTS = ('good', 'moderate', 'poor')
+BATCH_VERDICT_PATTERN = re.compile(r'^[\W_]*(?:job\s*id\s*[:#]?\s*)?(\S+?)[\s`*]*[:=\-]+[\s`*]*(good|moderate|poor)\b', re.IGNORECASE)
+# Output tokens reserved per job in a batched response (`<id>: <verdict>` line)
+BATCH_OUTPUT_TOKENS_PER_JOB = 16
+# Tokens kept free in the context window for the model's answer
+RESPONSE_RESERVE_TOKENS = 256
+
+
+def parse_batch_response(content: str, job_ids: List[str]) -> Dict[str, str]:
+    expected = set(job_ids)
+    verdicts = {}
+    for line in content.splitlines():
+        m = BATCH_VERDICT_PATTERN.match(line.strip())
+        if m and m.group(1) in expected:
+            verdicts[m.group(1)] = m.group(2).lower()
+    return verdicts
+
 
 class LLMService:
-    def __init__(self, llm_client):
+    def __init__(self, llm_client, model_name: str = '', rate_limiter: Optional[RateLimiter] = None, cache: Optional[VerdictCache] = None,
+                 max_retries: int = 5, backoff_base: float = 2.0, backoff_max: float = 60.0,
+                 batch_size: int = 1, context_tokens: int = 8192):
         self.llm = llm_client
-
-    def ask_llm(self, work_exp: str, skillset: str, job_description: str) -> str:
-        chat_prompt = ChatPromptTemplate.from_messages([
+        self.model_name = model_name
+        self.cache = cache
+        self.batch_size = max(1, batch_size)
+        self.context_tokens = context_tokens
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Imported here like the provider clients, so importing main does not load langchain
+        from langchain_core.prompts import ChatPromptTemplate
+        self.chat_prompt = ChatPromptTemplate.from_messages([
             ("system", SYS_PROMPT),
             ("human", SKILL_JOB_TEMPLATE)
         ])
+        self.batch_chat_prompt = ChatPromptTemplate.from_messages([
+            ("system", BATCH_SYS_PROMPT),
+            ("human", SKILL_JOB_TEMPLATE)
+        ])
+
+    def _record_usage(self, response, prompt_tokens: int, mode: str):
+        # Providers that report usage are counted exactly, the others fall back to the local estimate
+        usage = getattr(response, 'usage_metadata', None) or {}
+        METRICS.inc('llm_input_tokens_total', usage.get('input_tokens') or prompt_tokens, model=self.model_name, mode=mode)
+        METRICS.inc('llm_output_tokens_total', usage.get('output_tokens') or estimate_tokens(response.content), model=self.model_name, mode=mode)
+
+    def _invoke(self, formatted_prompt, prompt_tokens: int, mode: str = 'single'):
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire(prompt_tokens)
+            start = time.perf_counter()
+            try:
+                response = self.llm.invoke(formatted_prompt)
+                METRICS.observe('llm_request_seconds', time.perf_counter() - start, model=self.model_name, mode=mode)
+                METRICS.inc('llm_requests_total', model=self.model_name, mode=mode)
+                self._record_usage(response, prompt_tokens, mode)
+                return response
+            except Exception as e:
+                METRICS.inc('llm_errors_total', model=self.model_name, mode=mode, rate_limited=is_rate_limit_error(e))
+                if not is_rate_limit_error(e) or attempt >= self.max_retries:
+                    raise
+                delay = min(self.backoff_base * (2 ** attempt), self.backoff_max) * random.uniform(0.5, 1.0)
+                attempt += 1
+                logger.warning(f"LLM rate limited (attempt {attempt}/{self.max_retries}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _cache_key(self, work_exp: str, skillset: str, cache_text: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return VerdictCache.make_key(cache_text, skillset, work_exp, self.model_name, PROMPT_VERSION)
 
-        formatted_prompt = chat_prompt.invoke(
+    def ask_llm(self, work_exp: str, skillset: str, job_description: str, cache_text: Optional[str] = None) -> str:
+        # cache_text identifies the job in the verdict cache, e.g. the raw description when a compacted one is sent,
+        # as compaction depends on the rest of the run's corpus, make_key normalizes it before hashing
+        cache_key = self._cache_key(work_exp, skillset, job_description if cache_text is None else cache_text)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                METRICS.inc('llm_cache_hits_total', model=self.model_name)
+                return cached
+        return self._ask_single(work_exp, skillset, job_description, cache_key)
+
+    def _ask_single(self, work_exp: str, skillset: str, job_description: str, cache_key: Optional[str]) -> str:
+        formatted_prompt = self.chat_prompt.invoke(
             {
                 'work_exp': work_exp,
                 'skill': skillset,
@@ -20,6 +113,90 @@ class LLMService:
             }
         )
 
-        response = self.llm.invoke(formatted_prompt)
-        time.sleep(5)
-        return response.content
\ No newline at end of file
+        prompt_tokens = estimate_tokens(SYS_PROMPT) + estimate_tokens(work_exp) + estimate_tokens(skillset) + estimate_tokens(job_description)
+        response = self._invoke(formatted_prompt, prompt_tokens)
+        result = response.content
+        if result.strip().lower() not in VALID_VERDICTS:
+            METRICS.inc('llm_unparseable_responses_total', model=self.model_name, mode='single')
+        elif cache_key is not None:
+            self.cache.put(cache_key, result.strip())
+        return result
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()
+
+    def job_token_budget(self, work_exp: str, skillset: str) -> int:
+        fixed_tokens = estimate_tokens(SYS_PROMPT) + estimate_tokens(SKILL_JOB_TEMPLATE) + estimate_tokens(work_exp) + estimate_tokens(skillset)
+        return max(0, self.context_tokens - fixed_tokens - RESPONSE_RESERVE_TOKENS)
+
+    def make_batches(self, work_exp: str, skillset: str, jobs: Dict[str, str]) -> List[Dict[str, str]]:
+        fixed_tokens = estimate_tokens(BATCH_SYS_PROMPT) + estimate_tokens(SKILL_JOB_TEMPLATE) + estimate_tokens(work_exp) + estimate_tokens(skillset)
+        budget = self.context_tokens - fixed_tokens
+        batches = []
+        batch = {}
+        batch_tokens = 0
+        for job_id, job_description in jobs.items():
+            job_tokens = estimate_tokens(BATCH_JOB_TEMPLATE) + estimate_tokens(job_id) + estimate_tokens(job_description) + BATCH_OUTPUT_TOKENS_PER_JOB
+            if batch and (len(batch) >= self.batch_size or batch_tokens + job_tokens > budget):
+                batches.append(batch)
+                batch = {}
+                batch_tokens = 0
+            batch[job_id] = job_description
+            batch_tokens += job_tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _ask_batch_once(self, work_exp: str, skillset: str, jobs: Dict[str, str]) -> Dict[str, str]:
+        job_ads = "\n".join(BATCH_JOB_TEMPLATE.format(job_id=job_id, job_ad=job_description) for job_id, job_description in jobs.items())
+        formatted_prompt = self.batch_chat_prompt.invoke(
+            {
+                'work_exp': work_exp,
+                'skill': skillset,
+                'job_ad': job_ads
+            }
+        )
+        prompt_tokens = estimate_tokens(BATCH_SYS_PROMPT) + estimate_tokens(work_exp) + estimate_tokens(skillset) + estimate_tokens(job_ads)
+        response = self._invoke(formatted_prompt, prompt_tokens, mode='batch')
+        return parse_batch_response(response.content, list(jobs.keys()))
+
+    def ask_llm_batch(self, work_exp: str, skillset: str, jobs: Dict[str, str], cache_texts: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        # cache_texts maps job ids to the text they are cached under, see ask_llm
+        cache_texts = cache_texts or {}
+        results = {}
+        pending = {}
+        for job_id, job_description in jobs.items():
+            cache_key = self._cache_key(work_exp, skillset, cache_texts.get(job_id, job_description))
+            cached = self.cache.get(cache_key) if cache_key is not None else None
+            if cached is not None:
+                METRICS.inc('llm_cache_hits_total', model=self.model_name)
+                results[job_id] = cached
+            else:
+                pending[job_id] = job_description
+
+        if not pending:
+            return results
+        if len(pending) == 1:
+            job_id, job_description = next(iter(pending.items()))
+            results[job_id] = self._ask_single(work_exp, skillset, job_description,
+                                               self._cache_key(work_exp, skillset, cache_texts.get(job_id, job_description)))
+            return results
+
+        verdicts = self._ask_batch_once(work_exp, skillset, pending)
+        for job_id, verdict in verdicts.items():
+            results[job_id] = verdict
+            cache_key = self._cache_key(work_exp, skillset, cache_texts.get(job_id, pending[job_id]))
+            if cache_key is not None:
+                self.cache.put(cache_key, verdict)
+
+        missing = {job_id: desc for job_id, desc in pending.items() if job_id not in verdicts}
+        if missing:
+            METRICS.inc('llm_unparseable_responses_total', len(missing), model=self.model_name, mode='batch')
+            logger.info(f"{len(missing)} job(s) missing from batched LLM response, retrying in smaller batches")
+            missing_items = list(missing.items())
+            half = (len(missing_items) + 1) // 2
+            for part in (dict(missing_items[:half]), dict(missing_items[half:])):
+                if part:
+                    results.update(self.ask_llm_batch(work_exp, skillset, part, cache_texts))
+        return results
@@ -0,0 +1,55 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Sliding-window limiter on requests per minute and tokens per minute."""
+
+    WINDOW_SECONDS = 60
+
+    def __init__(self, rpm: Optional[int] = None, tpm: Optional[int] = None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = deque()  # (timestamp, tokens)
+        self._tokens_in_window = 0
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float):
+        while self._requests and now - self._requests[0][0] >= self.WINDOW_SECONDS:
+            _, tokens = self._requests.popleft()
+            self._tokens_in_window -= tokens
+
+    def _wait_time(self, now: float, tokens: int) -> float:
+        wait = 0.0
+        if self.rpm and len(self._requests) >= self.rpm:
+            wait = max(wait, self._requests[0][0] + self.WINDOW_SECONDS - now)
+        if self.tpm and self._requests and self._tokens_in_window + tokens > self.tpm:
+            # Wait until enough old requests fall out of the window to fit this one
+            released = self._tokens_in_window
+            for ts, req_tokens in self._requests:
+                released -= req_tokens
+                if released + tokens <= self.tpm:
+                    wait = max(wait, ts + self.WINDOW_SECONDS - now)
+                    break
+        return wait
+
+    def acquire(self, tokens: int = 0):
+        if not self.rpm and not self.tpm:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._evict(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    self._requests.append((now, tokens))
+                    self._tokens_in_window += tokens
+                    return
+            logger.debug(f"Rate limit reached, waiting {wait:.1f}s")
+            time.sleep(wait)
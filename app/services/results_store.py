@@ -0,0 +1,88 @@
+import logging
+import os
+from datetime import date, datetime
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from scrapers.job_attribute import JobAttr
+
+logger = logging.getLogger(__name__)
+
+# Every run is written with this schema so files of runs with and without the LLM stage stay compatible
+SCHEMA = pa.schema([
+    (JobAttr.JOB_ID, pa.string()),
+    (JobAttr.SEARCH_TITLE, pa.string()),
+    (JobAttr.COMPANY, pa.string()),
+    (JobAttr.JOB_TITLE, pa.string()),
+    (JobAttr.LOCATION, pa.string()),
+    (JobAttr.JOB_URL, pa.string()),
+    # Descriptions live in the description blob store, looked up by this hash
+    (JobAttr.DESC_HASH, pa.string()),
+    ('llm_comment', pa.string()),
+    ('validate_result', pa.bool_()),
+    ('prefilter_score', pa.float64()),
+    ('job_tokens_sent', pa.int64()),
+    ('run_id', pa.string()),
+    ('site', pa.string()),
+    ('date', pa.string()),
+])
+PARTITIONING = ds.partitioning(pa.schema([('site', pa.string()), ('date', pa.string())]), flavor='hive')
+# Low-cardinality columns are dictionary encoded, everything is zstd compressed
+DICTIONARY_COLUMNS = [JobAttr.SEARCH_TITLE, JobAttr.COMPANY, JobAttr.LOCATION, 'llm_comment', 'run_id']
+
+
+class ResultsStore:
+    """Append-only Parquet store of classified jobs, partitioned by site and run date."""
+
+    def __init__(self, root='results', compression='zstd'):
+        self.root = root
+        self.compression = compression
+
+    def append(self, df_jobs: pd.DataFrame, run_id: str, run_date: Optional[date] = None):
+        if df_jobs.empty:
+            return
+        run_date = run_date or datetime.now().date()
+        df_jobs = df_jobs.assign(run_id=run_id, date=run_date.isoformat())
+        df_jobs = df_jobs.reindex(columns=SCHEMA.names)
+        table = pa.Table.from_pandas(df_jobs, schema=SCHEMA, preserve_index=False)
+        file_format = ds.ParquetFileFormat()
+        ds.write_dataset(
+            table,
+            self.root,
+            format=file_format,
+            file_options=file_format.make_write_options(compression=self.compression, use_dictionary=DICTIONARY_COLUMNS),
+            partitioning=PARTITIONING,
+            # One file per run and partition, a resumed run overwrites its own files and never touches other runs
+            basename_template=f"{run_id}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore'
+        )
+        logger.info(f"Saved {len(df_jobs)} job(s) of run {run_id} to {self.root}")
+
+    def query(self, sites: Optional[List[str]] = None, verdicts: Optional[List[str]] = None, companies: Optional[List[str]] = None,
+              start_date: Optional[date] = None, end_date: Optional[date] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        if not os.path.isdir(self.root):
+            return pd.DataFrame(columns=columns or SCHEMA.names)
+
+        # Filters on site/date prune partitions, the others are pushed down to Parquet row group statistics
+        conditions = []
+        if sites:
+            conditions.append(pc.field('site').isin(sites))
+        if start_date:
+            conditions.append(pc.field('date') >= start_date.isoformat())
+        if end_date:
+            conditions.append(pc.field('date') <= end_date.isoformat())
+        if verdicts:
+            conditions.append(pc.field('llm_comment').isin([verdict.capitalize() for verdict in verdicts]))
+        if companies:
+            conditions.append(pc.field(JobAttr.COMPANY).isin(companies))
+
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+
+        dataset = ds.dataset(self.root, schema=SCHEMA, format='parquet', partitioning=PARTITIONING)
+        return dataset.to_table(columns=columns, filter=expression).to_pandas()
@@ -0,0 +1,149 @@
+import dataclasses
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from engine.models import SearchQuery
+from scrapers.job_record import JobRecord
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL_DIR = 'run_journals'
+
+
+class RunJournal:
+    """Per-run SQLite journal of scraped jobs, finished queries and LLM verdicts, written as they happen."""
+
+    def __init__(self, run_id: Optional[str] = None, journal_dir=DEFAULT_JOURNAL_DIR, resume: bool = False):
+        # The suffix keeps two runs started in the same second apart, the daemon starts one per task
+        self.run_id = run_id or f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}-{uuid.uuid4().hex[:8]}"
+        self.db_path = os.path.join(journal_dir, f"{self.run_id}.db")
+        if resume and not os.path.exists(self.db_path):
+            raise FileNotFoundError(f"No journal found for run {self.run_id} at {self.db_path}")
+        os.makedirs(journal_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        # Worker processes of a parallel run write to the same journal
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA busy_timeout=30000")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "task INTEGER NOT NULL, job_id TEXT NOT NULL, query INTEGER NOT NULL, record TEXT NOT NULL, scraped_at REAL NOT NULL, "
+            "PRIMARY KEY (task, job_id))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS queries (task INTEGER NOT NULL, query INTEGER NOT NULL, completed_at REAL NOT NULL, PRIMARY KEY (task, query))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS verdicts ("
+            "task INTEGER NOT NULL, job_id TEXT NOT NULL, verdict TEXT NOT NULL, classified_at REAL NOT NULL, PRIMARY KEY (task, job_id))"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('started_at', ?)", (datetime.now().isoformat(),))
+        self.conn.commit()
+        self.started_at = datetime.fromisoformat(self.conn.execute("SELECT value FROM meta WHERE key = 'started_at'").fetchone()[0])
+
+    def for_task(self, task_index: int) -> 'TaskJournal':
+        return TaskJournal(self, task_index)
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            with self.conn:
+                self.conn.execute(sql, params)
+
+    def _executemany(self, sql: str, rows):
+        with self._lock:
+            with self.conn:
+                self.conn.executemany(sql, rows)
+
+    def _fetchall(self, sql: str, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def delete(self):
+        # A completed run has nothing left to resume
+        self.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    @staticmethod
+    def prune(retention_days: Optional[float], journal_dir=DEFAULT_JOURNAL_DIR):
+        if not retention_days or not os.path.isdir(journal_dir):
+            return
+        cutoff = time.time() - retention_days * 86400
+        deleted = 0
+        for name in os.listdir(journal_dir):
+            path = os.path.join(journal_dir, name)
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                deleted += name.endswith('.db')
+        logger.info(f"Pruned {deleted} run journal(s) older than {retention_days} day(s)")
+
+
+class TaskJournal:
+    """View of a RunJournal for one task of the run."""
+
+    def __init__(self, journal: RunJournal, task_index: int):
+        self.journal = journal
+        self.task_index = task_index
+
+    def record_job(self, query_index: int, job: JobRecord):
+        self.journal._execute(
+            "INSERT OR IGNORE INTO jobs (task, job_id, query, record, scraped_at) VALUES (?, ?, ?, ?, ?)",
+            (self.task_index, str(job.job_id), query_index, json.dumps(job.to_dict()), time.time())
+        )
+
+    def complete_query(self, query_index: int):
+        self.journal._execute(
+            "INSERT OR IGNORE INTO queries (task, query, completed_at) VALUES (?, ?, ?)", (self.task_index, query_index, time.time())
+        )
+
+    def record_verdicts(self, verdicts: Dict[str, str]):
+        now = time.time()
+        self.journal._executemany(
+            "INSERT OR REPLACE INTO verdicts (task, job_id, verdict, classified_at) VALUES (?, ?, ?, ?)",
+            [(self.task_index, str(job_id), verdict, now) for job_id, verdict in verdicts.items()]
+        )
+
+    def jobs(self) -> List[JobRecord]:
+        rows = self.journal._fetchall("SELECT record FROM jobs WHERE task = ? ORDER BY scraped_at", (self.task_index,))
+        return [JobRecord.from_dict(json.loads(row[0])) for row in rows]
+
+    def verdicts(self) -> Dict[str, str]:
+        return dict(self.journal._fetchall("SELECT job_id, verdict FROM verdicts WHERE task = ?", (self.task_index,)))
+
+    def attach(self, scraper, queries: List[SearchQuery]) -> List[SearchQuery]:
+        # Returns the queries still to run, with num_jobs lowered by the jobs already journaled for them,
+        # and hooks the scraper so new jobs and finished queries are recorded as they happen
+        completed = {row[0] for row in self.journal._fetchall("SELECT query FROM queries WHERE task = ?", (self.task_index,))}
+        fetched = dict(self.journal._fetchall("SELECT query, COUNT(*) FROM jobs WHERE task = ? GROUP BY query", (self.task_index,)))
+        pending = []
+        query_indexes = {}
+        for query_index, query in enumerate(queries):
+            if query_index in completed:
+                continue
+            remaining = query.num_jobs - fetched.get(query_index, 0)
+            if remaining <= 0:
+                self.complete_query(query_index)
+                continue
+            pending_query = dataclasses.replace(query, num_jobs=remaining)
+            query_indexes[id(pending_query)] = query_index
+            pending.append(pending_query)
+
+        if len(pending) < len(queries):
+            logger.info(f"Resuming task {self.task_index + 1}: {len(queries) - len(pending)} of {len(queries)} query(ies) already completed, "
+                        f"{sum(fetched.values())} job(s) already fetched")
+        scraper.job_listeners.append(lambda job: self.record_job(query_indexes[id(scraper.curr_query)], job))
+        scraper.query_listeners.append(lambda query: self.complete_query(query_indexes[id(query)]))
+        return pending
@@ -0,0 +1,211 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+from common.metrics import METRICS
+from engine.orchestrator import Orchestrator
+from services.config_service import ConfigService
+from services.run_journal import RunJournal
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL_MINUTES = 60
+DEFAULT_POLL_SECONDS = 30
+DEFAULT_STATUS_PORT = 8765
+DEFAULT_RETENTION_DAYS = 7
+
+
+class TaskLock:
+    """Non-blocking lock file per task, so a task never runs twice at once, even from two processes."""
+
+    def __init__(self, lock_dir: str, task_name: str):
+        os.makedirs(lock_dir, exist_ok=True)
+        self.path = os.path.join(lock_dir, f"{re.sub(r'[^A-Za-z0-9_.-]', '_', task_name)}.lock")
+        self._file = None
+
+    def acquire(self) -> bool:
+        file = open(self.path, 'a+')
+        try:
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            file.close()
+            return False
+        self._file = file
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class TaskScheduler:
+    """Runs each configured task on its own interval with one long-lived orchestrator.
+
+    Tasks run one at a time as they share the warm browsers, a task that is still due when the previous one
+    finishes runs right after it. config.yml is reloaded when it changes, through `build_orchestrator`,
+    skillset files are read again on every run.
+    """
+
+    def __init__(self, config_service: ConfigService, build_orchestrator: Callable[[], Orchestrator]):
+        self.config_service = config_service
+        self.build_orchestrator = build_orchestrator
+        self.orchestrator = build_orchestrator()
+        self.status: Dict[str, dict] = {}
+        self._intervals: Dict[str, float] = {}
+        self._status_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._load_schedule()
+
+    @property
+    def daemon_config(self):
+        return self.config_service.get_config().get('daemon') or {}
+
+    def _load_schedule(self):
+        config = self.config_service.get_config()
+        default_interval = self.daemon_config.get('default_interval_minutes', DEFAULT_INTERVAL_MINUTES)
+        now = time.time()
+        intervals = {}
+        for index, task_config in enumerate(config.tasks):
+            intervals[Orchestrator.task_name(task_config, index)] = float(task_config.get('interval_minutes') or default_interval) * 60
+        with self._status_lock:
+            for name, interval in intervals.items():
+                status = self.status.setdefault(name, {'status': 'pending', 'running': False, 'last_started': None,
+                                                       'last_finished': None, 'last_duration_seconds': None, 'error': None})
+                # A new task runs right away, a changed interval counts from the task's last start
+                status['interval_minutes'] = interval / 60
+                status['next_run'] = status['last_started'] + interval if status['last_started'] else now
+            for name in set(self.status) - set(intervals):
+                del self.status[name]
+            self._intervals = intervals
+        logger.info(f"Scheduled task(s): {', '.join(f'{name} every {interval / 60:g}min' for name, interval in intervals.items())}")
+
+    def _reload_if_changed(self):
+        try:
+            if not self.config_service.reload_if_changed():
+                return
+            logger.info(f"{self.config_service.config_path} changed, reloading")
+            self.orchestrator = self.build_orchestrator()
+            self._load_schedule()
+        except Exception as e:
+            logger.error(f"Failed to reload {self.config_service.config_path}, keeping the previous config: {e}")
+
+    def _due_tasks(self) -> List[str]:
+        now = time.time()
+        with self._status_lock:
+            due = [(status['next_run'], name) for name, status in self.status.items() if status['next_run'] <= now]
+        return [name for _, name in sorted(due)]
+
+    def _update_status(self, name: str, **values):
+        with self._status_lock:
+            if name in self.status:
+                self.status[name].update(values)
+
+    def run_task(self, name: str):
+        lock = TaskLock(self.daemon_config.get('lock_dir', 'locks'), name)
+        if not lock.acquire():
+            logger.info(f"Task {name} is already running elsewhere, retrying on the next poll")
+            return
+        started_at = time.time()
+        self._update_status(name, status='running', running=True, last_started=started_at, next_run=started_at + self._intervals[name])
+        logger.info(f"Running task {name}")
+        try:
+            # Every run leaves a journal and a metrics file, completed journals are of no use to a daemon
+            self.orchestrator.run(task_names=[name], keep_journal=False)
+            result, error = 'ok', None
+        except Exception as e:
+            logger.exception(f"Task {name} failed")
+            result, error = 'failed', str(e)
+        finally:
+            lock.release()
+        self._prune_run_files()
+        finished_at = time.time()
+        self._update_status(name, status=result, running=False, error=error, last_finished=finished_at,
+                            last_duration_seconds=round(finished_at - started_at, 3))
+        logger.info(f"Task {name} {result} in {finished_at - started_at:.1f}s")
+
+    def _prune_run_files(self):
+        # Journals of failed runs are kept for a resume with main.py --resume until they are this old
+        retention_days = self.daemon_config.get('retention_days', DEFAULT_RETENTION_DAYS)
+        try:
+            RunJournal.prune(retention_days)
+            METRICS.prune_exports(retention_days, (self.config_service.get_config().get('metrics') or {}).get('dir', 'metrics'))
+        except OSError as e:
+            logger.error(f"Failed to prune run journals and metrics files: {e}")
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            self._reload_if_changed()
+            for name in self._due_tasks():
+                if self._stop.is_set():
+                    break
+                self.run_task(name)
+            self._stop.wait(self.daemon_config.get('poll_seconds', DEFAULT_POLL_SECONDS))
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self) -> dict:
+        with self._status_lock:
+            return {name: dict(status) for name, status in self.status.items()}
+
+
+class StatusServer:
+    """Local HTTP endpoint serving the scheduler's per-task status at / and the current run's metrics at /metrics."""
+
+    def __init__(self, scheduler: TaskScheduler, host: str = '127.0.0.1', port: int = DEFAULT_STATUS_PORT):
+        self.scheduler = scheduler
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path in ('/', '/status'):
+                    body, content_type = json.dumps(scheduler.snapshot(), indent=2).encode('utf-8'), 'application/json'
+                elif handler.path == '/metrics':
+                    body, content_type = METRICS.to_prometheus().encode('utf-8'), 'text/plain; version=0.0.4'
+                else:
+                    handler.send_error(404)
+                    return
+                handler.send_response(200)
+                handler.send_header('Content-Type', content_type)
+                handler.send_header('Content-Length', str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format, *args):
+                logger.debug(format % args)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='status-server', daemon=True)
+        self._thread.start()
+        logger.info(f"Status endpoint on http://{self.server.server_address[0]}:{self.server.server_address[1]}/")
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
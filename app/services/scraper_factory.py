@@ -1,17 +1,23 @@
-from scrapers.indeed_scrapper import IndeedScraper
-from scrapers.jobsdb_scrapper import JobsDbScrapper
-from scrapers.linkedin_scrapper import LinkedInScrapper
+from typing import TYPE_CHECKING, Optional
+
+from common.registry import LazyRegistry
+
+if TYPE_CHECKING:
+    from scrapers.browser_pool import BrowserPool
+
+# A site's module is imported the first time a task scrapes it, third-party sites are plugged in through the
+# `job_scraper.sites` entry points and must provide AbstractScrapper.from_config
+SITES = LazyRegistry('site', group='job_scraper.sites', targets={
+    'linkedin': 'scrapers.linkedin_scrapper:LinkedInScrapper',
+    'indeed': 'scrapers.indeed_scrapper:IndeedScraper',
+    'jobsdb': 'scrapers.jobsdb_scrapper:JobsDbScrapper',
+})
+
 
 class ScraperFactory:
-    def __init__(self, config):
+    def __init__(self, config, browser_pool: Optional['BrowserPool'] = None):
         self.config = config
+        self.browser_pool = browser_pool
 
-    def create_scraper(self, site_name: str):
-        if site_name == 'linkedin':
-            return LinkedInScrapper(selenium_config=self.config.selenium)
-        elif site_name == 'indeed':
-            return IndeedScraper(selenium_config=self.config.selenium, indeed_url=self.config.indeed_url)
-        elif site_name == 'jobsdb':
-            return JobsDbScrapper(selenium_config=self.config.selenium, jobsdb_url=self.config.jobsdb_url)
-        else:
-            raise ValueError(f"Unsupported site: {site_name}")
\ No newline at end of file
+    def create_scraper(self, site_name: str, worker_id: Optional[int] = None):
+        return SITES.get(site_name).from_config(self.config, worker_id=worker_id, browser_pool=self.browser_pool)
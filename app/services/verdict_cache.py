@@ -0,0 +1,96 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r'\s+', ' ', (text or '')).strip().lower()
+
+
+class VerdictCache:
+    """SQLite-backed cache of LLM verdicts keyed on the full prompt inputs."""
+
+    EVICT_EVERY = 500
+
+    def __init__(self, db_path='cache/llm_verdicts.db', ttl_days: Optional[float] = 30, max_entries: Optional[int] = 100000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_days * 86400 if ttl_days else None
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._puts_since_evict = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS verdicts ("
+            "key TEXT PRIMARY KEY, verdict TEXT NOT NULL, created_at REAL NOT NULL, last_used_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_verdicts_last_used ON verdicts(last_used_at)")
+        self.conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(job_description: str, skillset: str, work_exp: str, model: str, prompt_version: str) -> str:
+        digest = hashlib.sha256()
+        for part in (job_description, skillset, work_exp, model, prompt_version):
+            digest.update(_normalize(part).encode('utf-8'))
+            digest.update(b'\x00')
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute("SELECT verdict, created_at FROM verdicts WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.ttl_seconds and now - row[1] > self.ttl_seconds):
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE verdicts SET last_used_at = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, verdict: str):
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO verdicts (key, verdict, created_at, last_used_at) VALUES (?, ?, ?, ?)",
+                (key, verdict, now, now)
+            )
+            self.conn.commit()
+            self._puts_since_evict += 1
+        if self._puts_since_evict >= self.EVICT_EVERY:
+            self.evict()
+
+    def evict(self):
+        with self._lock:
+            self._puts_since_evict = 0
+            if self.ttl_seconds:
+                self.conn.execute("DELETE FROM verdicts WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            if self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM verdicts WHERE key IN ("
+                    "SELECT key FROM verdicts ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+            self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }